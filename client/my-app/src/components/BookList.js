@@ -1,4 +1,5 @@
 import React, { useState, useEffect, useContext } from "react";
+import axios from "axios";
 import api from "../services/api";
 import { AuthContext } from "../auth/AuthContext";
 import { useNavigate } from "react-router-dom";
@@ -11,6 +12,9 @@ const BookList = () => {
   const [publisherQuery, setPublisherQuery] = useState("");
   const [levelQuery, setLevelQuery] = useState("");
   const [subjectQuery, setSubjectQuery] = useState("");
+  // What is typed in the subject box; subjectQuery follows it after a pause
+  const [subjectInput, setSubjectInput] = useState("");
+  const [suggestions, setSuggestions] = useState([]);
 
   // Sort
   const [sortBy, setSortBy] = useState("title");
@@ -76,6 +80,39 @@ const BookList = () => {
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [publisherQuery, levelQuery, subjectQuery, sortBy, direction, page, limit]);
 
+  // Suggestions come from the cheap /api/autocomplete after a short pause;
+  // the full /api/filter query only runs once typing stops. Each keystroke
+  // aborts the previous suggestions request, so a slow answer for an older
+  // prefix can never replace the current one.
+  useEffect(() => {
+    const q = subjectInput.trim();
+    if (!q) {
+      setSuggestions([]);
+      setSubjectQuery("");
+      return;
+    }
+    const controller = new AbortController();
+    const suggestTimer = setTimeout(() => {
+      api
+        .get("/api/autocomplete", { params: { q, limit: 8 }, signal: controller.signal })
+        .then((res) => {
+          if (res.data.query === q) setSuggestions(res.data.suggestions);
+        })
+        .catch((error) => {
+          if (!axios.isCancel(error)) setSuggestions([]);
+        });
+    }, 100);
+    const filterTimer = setTimeout(() => {
+      setPage(1);
+      setSubjectQuery(q);
+    }, 400);
+    return () => {
+      clearTimeout(suggestTimer);
+      clearTimeout(filterTimer);
+      controller.abort();
+    };
+  }, [subjectInput]);
+
   // 4) Deleting a book
   const handleDelete = async (id) => {
     if (!token) {
@@ -99,6 +136,7 @@ const BookList = () => {
     setPublisherQuery("");
     setLevelQuery("");
     setSubjectQuery("");
+    setSubjectInput("");
     setPage(1);
     setLimit(10); // optional, show more items
     // Or if you prefer calling /api/books:
@@ -129,12 +167,17 @@ const BookList = () => {
 
         <label> Subject: </label>
         <input
-          value={subjectQuery}
-          onChange={(e) => {
-            setPage(1);
-            setSubjectQuery(e.target.value);
-          }}
+          value={subjectInput}
+          list="subject-suggestions"
+          onChange={(e) => setSubjectInput(e.target.value)}
         />
+        <datalist id="subject-suggestions">
+          {suggestions.map((s) => (
+            <option key={`${s.type}:${s.text}`} value={s.text}>
+              {s.type} ({s.count})
+            </option>
+          ))}
+        </datalist>
       </div>
 
       <div style={{ marginTop: "1rem" }}>
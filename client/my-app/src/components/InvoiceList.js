@@ -6,23 +6,31 @@ import { AuthContext } from "../auth/AuthContext";
 function InvoicesList() {
   const { token } = useContext(AuthContext);
   const [invoices, setInvoices] = useState([]);
+  // Cursor for the next page (null once everything is loaded)
+  const [nextCursor, setNextCursor] = useState(null);
   const [error, setError] = useState("");
 
+  // Fetch one page; 'after' is the cursor from the previous page, if any
+  const fetchInvoices = async (after) => {
+    try {
+      setError("");
+      const config = {
+        headers: { Authorization: `Bearer ${token}` },
+        params: { after: after || undefined },
+      };
+      const res = await axios.get("http://127.0.0.1:5000/api/invoices", config);
+      setInvoices((prev) => (after ? [...prev, ...res.data.data] : res.data.data));
+      setNextCursor(res.data.next_cursor);
+    } catch (err) {
+      console.error(err);
+      setError("Failed to load invoices");
+    }
+  };
+
   useEffect(() => {
     if (!token) return;
-    const fetchInvoices = async () => {
-      try {
-        const config = {
-          headers: { Authorization: `Bearer ${token}` }
-        };
-        const res = await axios.get("http://127.0.0.1:5000/api/invoices", config);
-        setInvoices(res.data);
-      } catch (err) {
-        console.error(err);
-        setError("Failed to load invoices");
-      }
-    };
     fetchInvoices();
+    // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [token]);
 
   return (
@@ -36,6 +44,9 @@ function InvoicesList() {
           </li>
         ))}
       </ul>
+      {nextCursor && (
+        <button onClick={() => fetchInvoices(nextCursor)}>Load more</button>
+      )}
     </div>
   );
 }
@@ -23,6 +23,7 @@ function InvoicePage() {
   // For viewing past invoices (optional)
   const [showPastInvoices, setShowPastInvoices] = useState(false);
   const [pastInvoices, setPastInvoices] = useState([]);
+  const [pastCursor, setPastCursor] = useState(null);
   const [pastError, setPastError] = useState("");
 
   // 1) Searching for books
@@ -44,7 +45,15 @@ function InvoicePage() {
       });
       if (res.data.data) {
         // /api/filter returns { data: [...] }
-        setSearchResults(res.data.data);
+        let results = res.data.data;
+        if (results.length === 0) {
+          // Nothing matched exactly; retry tolerating typos ("langauge")
+          const fuzzyRes = await axios.get("http://127.0.0.1:5000/api/filter", {
+            params: { subject: searchQuery, fuzzy: 1, limit: 50 },
+          });
+          results = fuzzyRes.data.data;
+        }
+        setSearchResults(results);
       } else {
         // or if /api/filter just returns an array
         setSearchResults(res.data);
@@ -105,22 +114,29 @@ function InvoicePage() {
     }
   };
 
-  // 5) Toggle or fetch past invoices
+  // 5) Toggle or fetch past invoices, a page at a time ('after' = cursor
+  //    from the previous page; none to start over)
+  const fetchPastInvoices = async (after) => {
+    try {
+      setPastError("");
+      const config = {
+        headers: { Authorization: `Bearer ${token}` },
+        params: { after: after || undefined },
+      };
+      const res = await axios.get("http://127.0.0.1:5000/api/invoices", config);
+      setPastInvoices((prev) => (after ? [...prev, ...res.data.data] : res.data.data));
+      setPastCursor(res.data.next_cursor);
+    } catch (err) {
+      console.error(err);
+      setPastError("Failed to load past invoices");
+    }
+  };
+
   const handleTogglePastInvoices = async () => {
     setShowPastInvoices(!showPastInvoices);
     if (!showPastInvoices) {
       // we are about to show them, so fetch
-      try {
-        setPastError("");
-        const config = {
-          headers: { Authorization: `Bearer ${token}` },
-        };
-        const res = await axios.get("http://127.0.0.1:5000/api/invoices", config);
-        setPastInvoices(res.data);
-      } catch (err) {
-        console.error(err);
-        setPastError("Failed to load past invoices");
-      }
+      fetchPastInvoices();
     }
   };
 
@@ -206,6 +222,9 @@ function InvoicePage() {
                 </li>
               ))}
             </ul>
+            {pastCursor && (
+              <button onClick={() => fetchPastInvoices(pastCursor)}>Load more</button>
+            )}
           </div>
         )}
       </div>
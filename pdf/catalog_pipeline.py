@@ -0,0 +1,155 @@
+"""
+Turns a publisher price-list PDF straight into catalog rows.
+
+Parsing a page's tables is the expensive part, so each page's parsed
+table rows are cached on disk under a hash of the page's raw content
+stream. Re-running on a revised PDF only re-parses the pages that actually
+changed. Publisher/level headings carry over from one page to the next,
+so that (cheap) pass is replayed over all pages on every run.
+
+The server's `flask custom import-pdf` command feeds the resulting rows to
+importer.upsert_books, which only writes the books that changed.
+"""
+import pdfplumber
+import hashlib
+import json
+import os
+import re
+import argparse
+
+DEFAULT_CACHE_DIR = ".pdf_cache"
+# Bump when parse_page_tables changes so stale cache entries are ignored
+PARSER_VERSION = 1
+
+HEADER_CELLS = {"NO", "ISBN", "TITLE", "PRICE", "STATUS"}
+
+# Section headings that name a publisher rather than a level/section
+KNOWN_PUBLISHERS = {
+    "KENYA LITERATURE BUREAU", "LONGHORN", "MENTOR", "OXFORD", "QUEENEX",
+    "SIGNAL", "SMARTBRAINZ", "STORYMOJA", "MORAN (EA) PUBLISHERS LTD",
+    "SPOTLIGHT PUBLISHERS",
+}
+PUBLISHER_HINT_RE = re.compile(r"\b(PUBLISHERS?|LTD|LIMITED|BUREAU|PRESS)\b", re.I)
+
+
+def page_fingerprint(page):
+    """SHA-256 of a page's raw content streams and size (no text extraction)."""
+    h = hashlib.sha256(f"v{PARSER_VERSION}:{page.width}x{page.height}".encode())
+    contents = page.page_obj.contents or []
+    for stream in contents if isinstance(contents, list) else [contents]:
+        h.update(stream.get_data())
+    return h.hexdigest()
+
+
+def parse_page_tables(tables):
+    """
+    Reduce a page's extracted tables to a list of events:
+      ["label", "GRADE 1"]                   a section heading
+      ["item", {isbn, title, price, status}] a price-list row
+    Headings are not yet resolved into publisher/level here, so the result
+    depends only on this page and can be cached by its fingerprint.
+    """
+    events = []
+    for table in tables:
+        for row in table:
+            # Spanning cells come back as None; drop them to realign columns
+            cells = [(c or "").replace("\n", " ").strip() for c in row if c is not None]
+            filled = [c for c in cells if c]
+            if not filled:
+                continue
+            if {c.upper() for c in filled} <= HEADER_CELLS:
+                continue
+            if len(filled) == 1 and not cells[0].isdigit():
+                events.append(["label", " ".join(filled[0].split())])
+                continue
+            if len(cells) >= 5 and cells[2]:
+                _, isbn, title, price, status = cells[:5]
+                events.append(["item", {
+                    "isbn": isbn or None,
+                    "title": " ".join(title.split()),
+                    "price": _parse_price(price),
+                    "status": status or None,
+                }])
+    return events
+
+
+def _parse_price(text):
+    try:
+        return float(text.replace(",", ""))
+    except (AttributeError, ValueError):
+        return None
+
+
+def is_publisher_label(label):
+    return label.upper() in KNOWN_PUBLISHERS or bool(PUBLISHER_HINT_RE.search(label))
+
+
+def extract_page_events(pdf_path, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Return (events per page, stats). Pages whose fingerprint is already in
+    cache_dir are read from the cache instead of being parsed.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    stats = {"pages": 0, "cached": 0, "parsed": 0}
+    pages = []
+
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages:
+            stats["pages"] += 1
+            cache_path = os.path.join(cache_dir, page_fingerprint(page) + ".json")
+            if os.path.exists(cache_path):
+                with open(cache_path, "r", encoding="utf-8") as f:
+                    pages.append(json.load(f))
+                stats["cached"] += 1
+                continue
+
+            events = parse_page_tables(page.extract_tables())
+            # Write then rename so an interrupted run never leaves a torn entry
+            tmp_path = cache_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(events, f)
+            os.replace(tmp_path, cache_path)
+            pages.append(events)
+            stats["parsed"] += 1
+            page.flush_cache()
+
+    return pages, stats
+
+
+def books_from_events(pages):
+    """
+    Resolve headings into publisher/level and yield catalog rows:
+    {"publisher", "level", "isbn", "title", "price", "status"}.
+    """
+    publisher = level = None
+    for events in pages:
+        for kind, value in events:
+            if kind == "label":
+                if publisher is None or is_publisher_label(value):
+                    publisher, level = value, None
+                else:
+                    level = value
+            elif publisher is not None:
+                yield {"publisher": publisher, "level": level, **value}
+
+
+def extract_catalog(pdf_path, cache_dir=DEFAULT_CACHE_DIR):
+    """Parse a price-list PDF into (list of catalog rows, page stats)."""
+    pages, stats = extract_page_events(pdf_path, cache_dir)
+    return list(books_from_events(pages)), stats
+
+
+# Example usage
+if __name__ == "__main__":
+    here = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Parse a price-list PDF into catalog rows (JSON).")
+    parser.add_argument("pdf_path", nargs="?", default=os.path.join(here, "example.pdf"))
+    parser.add_argument("json_path", nargs="?", default="catalog.json")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    args = parser.parse_args()
+
+    rows, stats = extract_catalog(args.pdf_path, args.cache_dir)
+    with open(args.json_path, "w", encoding="utf-8") as f:
+        json.dump(rows, f, indent=4)
+    print(f"{len(rows)} books from {stats['pages']} pages "
+          f"({stats['parsed']} parsed, {stats['cached']} from cache) -> {args.json_path}")
@@ -1,34 +1,107 @@
 import pdfplumber
 import json
+import os
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 
-def pdf_to_json(pdf_path, json_path):
+# Each worker gets several small page ranges rather than one big one, so a
+# few slow (table-heavy) pages don't leave the other workers idle.
+CHUNKS_PER_WORKER = 4
+
+
+def extract_page(page, page_num):
+    """Extract the text and tables of one pdfplumber page."""
+    # Extract text
+    text = page.extract_text()
+
+    # Extract tables
+    tables = page.extract_tables()
+
+    # Prepare page data
+    return {
+        "page_number": page_num + 1,
+        "content": text,
+        "tables": tables
+    }
+
+
+# Opened once per worker process by _init_worker; opening a large PDF
+# costs seconds, so it must not happen per page range.
+_worker_pdf = None
+
+
+def _init_worker(pdf_path):
+    global _worker_pdf
+    _worker_pdf = pdfplumber.open(pdf_path)
+
+
+def _worker_page_count():
+    return len(_worker_pdf.pages)
+
+
+def _extract_range(start, stop):
+    """Worker: extract pages [start, stop) of the worker's open PDF."""
+    pages = []
+    for i in range(start, stop):
+        page = _worker_pdf.pages[i]
+        pages.append(extract_page(page, i))
+        # Drop pdfplumber's per-page object cache to keep workers small
+        page.flush_cache()
+    return pages
+
+
+def _page_ranges(page_count, workers):
+    """Split range(page_count) into contiguous (start, stop) chunks."""
+    chunks = min(page_count, workers * CHUNKS_PER_WORKER)
+    size, extra = divmod(page_count, chunks)
+    ranges, start = [], 0
+    for i in range(chunks):
+        stop = start + size + (1 if i < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def extract_pages(pdf_path, workers=1):
     """
-    Converts a PDF file into a JSON format with text and tables.
+    Extract every page of a PDF, in page order.
 
     Args:
         pdf_path (str): Path to the input PDF file.
-        json_path (str): Path to save the output JSON file.
+        workers (int): 1 for the serial path, N for N worker processes,
+            0 to use every CPU.
     """
-    extracted_data = {"pages": []}
+    if workers == 0:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1:
+        with pdfplumber.open(pdf_path) as pdf:
+            return [extract_page(page, i) for i, page in enumerate(pdf.pages)]
 
-    # Open the PDF
-    with pdfplumber.open(pdf_path) as pdf:
-        for page_num, page in enumerate(pdf.pages):
-            # Extract text
-            text = page.extract_text()
+    pages = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(pdf_path,)) as pool:
+        page_count = pool.submit(_worker_page_count).result()
+        if page_count == 0:
+            return []
+        ranges = _page_ranges(page_count, workers)
+        # map() yields results in submission order, i.e. page order
+        for chunk in pool.map(_extract_range, [r[0] for r in ranges], [r[1] for r in ranges]):
+            pages.extend(chunk)
+    return pages
 
-            # Extract tables
-            tables = page.extract_tables()
 
-            # Prepare page data
-            page_data = {
-                "page_number": page_num + 1,
-                "content": text,
-                "tables": tables
-            }
+def pdf_to_json(pdf_path, json_path, workers=1):
+    """
+    Converts a PDF file into a JSON format with text and tables.
 
-            # Append to extracted data
-            extracted_data["pages"].append(page_data)
+    Args:
+        pdf_path (str): Path to the input PDF file.
+        json_path (str): Path to save the output JSON file.
+        workers (int): Worker processes to use (see extract_pages).
+    """
+    extracted_data = {"pages": extract_pages(pdf_path, workers)}
 
     # Save to JSON file
     with open(json_path, "w", encoding="utf-8") as json_file:
@@ -36,8 +109,47 @@ def pdf_to_json(pdf_path, json_path):
 
     print(f"PDF data successfully saved to {json_path}")
 
+
+def benchmark(pdf_path, workers=0, repeat=3):
+    """
+    Time the serial path against the process pool on the same PDF and
+    check that both produce identical output.
+    """
+    if workers == 0:
+        workers = os.cpu_count() or 1
+
+    def best_of(n_workers):
+        best, result = None, None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = extract_pages(pdf_path, n_workers)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
+
+    serial_time, serial_pages = best_of(1)
+    parallel_time, parallel_pages = best_of(workers)
+
+    print(f"{pdf_path}: {len(serial_pages)} pages, best of {repeat}")
+    print(f"  serial          : {serial_time:.2f}s")
+    print(f"  {workers:2d} workers      : {parallel_time:.2f}s "
+          f"({serial_time / parallel_time:.1f}x)")
+    print(f"  identical output: {serial_pages == parallel_pages}")
+
+
 # Example usage
 if __name__ == "__main__":
-    # Replace 'example.pdf' with your PDF file path
-    pdf_to_json("/home/benjamin/Desktop/work/Tanami/Tanami/pdf/example.pdf", "output.json")
+    here = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Extract text and tables from a PDF into JSON.")
+    parser.add_argument("pdf_path", nargs="?", default=os.path.join(here, "example.pdf"))
+    parser.add_argument("json_path", nargs="?", default="output.json")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="worker processes (1 = serial, 0 = one per CPU)")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="compare serial and parallel extraction instead of writing JSON")
+    args = parser.parse_args()
 
+    if args.benchmark:
+        benchmark(args.pdf_path, args.workers if args.workers != 1 else 0)
+    else:
+        pdf_to_json(args.pdf_path, args.json_path, args.workers)
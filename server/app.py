@@ -1,11 +1,18 @@
 # app.py
 
+import os
 from flask import Flask
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 
-def create_app():
+def create_app(config=None):
+    """
+    Build the Flask app. Settings are read, later ones winning, from the
+    defaults below, instance/settings.py, the DATABASE_URL environment
+    variable and 'config' (a dict),
+    e.g. create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///bench.db"}).
+    """
     app = Flask(__name__)
 
     # Basic config
@@ -13,9 +20,33 @@ def create_app():
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
     app.config["SECRET_KEY"] = "SUPER-SECRET-KEY"
     app.config["JWT_SECRET_KEY"] = "JWT-SECRET-KEY"
+    # Per-deployment settings (database URL, pool sizes, secrets)
+    app.config.from_pyfile(os.path.join(app.instance_path, "settings.py"), silent=True)
+    if os.environ.get("DATABASE_URL"):
+        app.config["SQLALCHEMY_DATABASE_URI"] = os.environ["DATABASE_URL"]
+    if config:
+        app.config.update(config)
+
+    # Password hashing pool settings (see passwords.py)
+    import passwords
+    passwords.init_app(app)
+
+    # Write-behind audit log (see audit.py)
+    import audit
+    audit.init_app(app)
 
     from models import db  # import the single db instance
-    db.init_app(app)
+    # Engine options and SQLite PRAGMAs (see database.py)
+    import database
+    database.init_app(app)
+
+    # Per-endpoint latency / SQL metrics at GET /metrics (see metrics.py)
+    import metrics
+    metrics.init_app(app)
+
+    # Opt-in slow-query log and N+1 detector (see diagnostics.py)
+    import diagnostics
+    diagnostics.init_app(app)
 
     migrate = Migrate(app, db)
     jwt = JWTManager(app)
@@ -26,10 +57,24 @@ def create_app():
     from routes_books import books_bp
     from routes_users import users_bp
     from routes_invoices import invoices_bp
+    from routes_audit import audit_bp
+    from routes_reports import reports_bp
 
     app.register_blueprint(books_bp, url_prefix="/api")
     app.register_blueprint(users_bp, url_prefix="/api")
     app.register_blueprint(invoices_bp, url_prefix="/api")
+    app.register_blueprint(audit_bp, url_prefix="/api")
+    app.register_blueprint(reports_bp, url_prefix="/api")
+
+    # In-memory search indexes, built in the background (see memindex.py)
+    import memindex
+    from fuzzy import TrigramIndex
+    from autocomplete import PrefixIndex
+    memindex.init_app(app, (TrigramIndex, PrefixIndex))
+
+    # CLI: flask custom seed-data / import-books / rebuild-rollups
+    import commands
+    commands.init_app(app)
 
     return app
 
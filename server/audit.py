@@ -0,0 +1,178 @@
+# audit.py
+"""
+BookAudit logging.
+
+Routes call record_audit() *before* committing the change they describe.
+What happens next depends on AUDIT_MODE:
+
+  "sync"   the BookAudit row is added to the same session, so it is
+           committed together with the book change (one commit, durable).
+  "async"  the row is held until that session commits, then handed to a
+           background AuditWriter that inserts queued rows in batches
+           (group commit). If the change rolls back, its audit row is
+           dropped with it.
+
+Each app gets its own writer (app.extensions["audit_writer"]), bound to
+that app and so to its database. A row is written at most one flush
+interval after the first row of its batch was queued, or sooner if the
+batch fills up. The writer drains its queue on interpreter shutdown, and
+flush() can be called to wait until everything queued so far is written.
+
+Config: AUDIT_MODE, AUDIT_BATCH_SIZE, AUDIT_FLUSH_INTERVAL (seconds),
+AUDIT_QUEUE_SIZE (producers block when it is full).
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+from flask import current_app, has_app_context
+from models import db, BookAudit
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "AUDIT_MODE": "async",
+    "AUDIT_BATCH_SIZE": 200,
+    "AUDIT_FLUSH_INTERVAL": 0.5,
+    "AUDIT_QUEUE_SIZE": 10000,
+}
+
+_PENDING_KEY = "pending_audits"
+
+
+class AuditWriter:
+    """Background thread that writes queued audit rows in group commits."""
+
+    def __init__(self, app, batch_size, flush_interval, queue_size):
+        self.app = app
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def submit(self, rows):
+        self._ensure_started()
+        for row in rows:
+            self._queue.put(row)
+
+    def flush(self):
+        """Block until every row submitted so far has been written."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self):
+        """Stop the thread after writing whatever is still queued."""
+        if self._thread is not None and self._pid == os.getpid():
+            self._stop.set()
+            self._thread.join()
+
+    def _ensure_started(self):
+        # Start lazily, and again in a forked worker (threads don't survive fork)
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._stop.clear()
+                self._thread = threading.Thread(
+                    target=self._run, name="audit-writer", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            # Gather whatever else arrives within one flush interval of the
+            # first row; a steady trickle must not keep pushing the write back
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get(timeout=max(0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            self._write(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _write(self, batch):
+        with self.app.app_context():
+            try:
+                db.session.execute(insert(BookAudit), batch)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                logger.exception("Failed to write %d audit rows", len(batch))
+            finally:
+                db.session.remove()
+
+
+WRITER_KEY = "audit_writer"
+
+
+def init_app(app):
+    """Register audit config defaults and this app's writer."""
+    for key, value in DEFAULTS.items():
+        app.config.setdefault(key, value)
+    writer = AuditWriter(
+        app,
+        app.config["AUDIT_BATCH_SIZE"],
+        app.config["AUDIT_FLUSH_INTERVAL"],
+        app.config["AUDIT_QUEUE_SIZE"],
+    )
+    app.extensions[WRITER_KEY] = writer
+    atexit.register(writer.close)
+
+
+def _current_writer():
+    """The current app's AuditWriter, or None outside an app / before init_app."""
+    if not has_app_context():
+        return None
+    return current_app.extensions.get(WRITER_KEY)
+
+
+def record_audit(user_id, book_id, action, old_data=None, new_data=None):
+    """Log a book change. Call before committing the change itself."""
+    row = {
+        "user_id": user_id,
+        "book_id": book_id,
+        "action": action,
+        "old_data": old_data,
+        "new_data": new_data,
+        "timestamp": datetime.utcnow(),
+    }
+    if current_app.config["AUDIT_MODE"] == "sync" or _current_writer() is None:
+        db.session.add(BookAudit(**row))
+    else:
+        db.session.info.setdefault(_PENDING_KEY, []).append(row)
+
+
+def flush_audits():
+    """Wait for queued audit rows to reach the database (async mode)."""
+    writer = _current_writer()
+    if writer is not None:
+        writer.flush()
+
+
+@event.listens_for(Session, "after_commit")
+def _queue_committed_audits(session):
+    rows = session.info.pop(_PENDING_KEY, None)
+    writer = _current_writer()
+    if rows and writer is not None:
+        writer.submit(rows)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_rolled_back_audits(session, previous_transaction):
+    if not session.in_transaction():
+        session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,136 @@
+# autocomplete.py
+"""
+Prefix autocomplete for the search boxes, from an in-memory sorted index.
+
+Each distinct title and publisher name is stored under every word it
+contains, from that word to the end ("klb skillgrow language" also
+under "skillgrow language" and "language"). The keys live in one
+sorted list per kind, so a lookup is a bisect to the first key >= the
+typed prefix followed by a short forward scan: O(log n + k) with no
+database query for the suggestions themselves.
+
+Each suggestion carries the number of books it stands for (a title can
+repeat across publishers/levels). Entries are added when that count
+goes 0 -> 1 and removed at 1 -> 0.
+
+Like fuzzy.TrigramIndex, there is one index per app and process, built
+and kept current in the background as described in memindex.py; the
+book routes call suggestions_index().update() after committing.
+"""
+from bisect import bisect_left, insort
+from collections import Counter
+from models import Book
+from memindex import VersionedIndex
+from search import words
+
+KINDS = ("publisher", "title")
+MAX_SUGGESTIONS = 20
+
+
+def normalize(text):
+    """Lowercase words joined by single spaces: 'KLB  Skill-grow' -> 'klb skill grow'."""
+    return " ".join(words(text))
+
+
+def _word_suffixes(normalized):
+    parts = normalized.split(" ")
+    return [" ".join(parts[i:]) for i in range(len(parts))]
+
+
+class _Suggestions:
+    """Sorted (key, text) lists per kind, plus book counts."""
+
+    def __init__(self, keys, counts):
+        self.keys = keys  # kind -> sorted [(key, text), ...]
+        self.counts = counts  # (kind, text) -> books
+
+    def add_book(self, title, publisher):
+        for kind, text in (("title", title), ("publisher", publisher)):
+            if not text:
+                continue
+            self.counts[(kind, text)] += 1
+            if self.counts[(kind, text)] == 1:
+                for key in _word_suffixes(normalize(text)):
+                    insort(self.keys[kind], (key, text))
+
+    def remove_book(self, title, publisher):
+        for kind, text in (("title", title), ("publisher", publisher)):
+            if not text or not self.counts[(kind, text)]:
+                continue
+            self.counts[(kind, text)] -= 1
+            if not self.counts[(kind, text)]:
+                del self.counts[(kind, text)]
+                keys = self.keys[kind]
+                for key in _word_suffixes(normalize(text)):
+                    i = bisect_left(keys, (key, text))
+                    if i < len(keys) and keys[i] == (key, text):
+                        del keys[i]
+
+
+class PrefixIndex(VersionedIndex):
+    """Titles and publishers by word-boundary prefix. Thread-safe."""
+
+    extension = "suggestions_index"
+    columns = (Book.title, Book.publisher)
+
+    def suggest(self, prefix, limit=10, kinds=KINDS):
+        """
+        Up to 'limit' suggestions starting (at a word boundary) with
+        'prefix': [{"text", "type", "count"}, ...], publishers first, each
+        kind ordered alphabetically from the matched word on.
+        Example: suggest("skillg") -> [{"text": "KLB skillgrow language", ...}]
+        """
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        data = self._current()
+        if data is None:
+            return []
+
+        suggestions = []
+        with self._lock:
+            for kind in kinds:
+                keys = data.keys[kind]
+                seen = set()
+                i = bisect_left(keys, (prefix,))
+                while i < len(keys) and len(suggestions) < limit and keys[i][0].startswith(prefix):
+                    text = keys[i][1]
+                    if text not in seen:
+                        seen.add(text)
+                        suggestions.append({"text": text, "type": kind,
+                                            "count": data.counts[(kind, text)]})
+                    i += 1
+        return suggestions
+
+    def update(self, old=None, new=None):
+        """
+        Reflect a committed book change. old/new are the book's
+        (title, publisher) before and after; None for a create/delete.
+        """
+        super().update(old, new)
+
+    def _load(self, rows):
+        counts = Counter()
+        for title, publisher in rows:
+            if title:
+                counts[("title", title)] += 1
+            if publisher:
+                counts[("publisher", publisher)] += 1
+
+        keys = {kind: [] for kind in KINDS}
+        for kind, text in counts:
+            keys[kind].extend((key, text) for key in _word_suffixes(normalize(text)))
+        for kind_keys in keys.values():
+            kind_keys.sort()
+        return _Suggestions(keys, counts)
+
+    def _apply(self, data, old, new):
+        if old is not None:
+            data.remove_book(*old)
+        if new is not None:
+            data.add_book(*new)
+
+
+def suggestions_index():
+    """The current app's PrefixIndex."""
+    return PrefixIndex.for_app()
@@ -0,0 +1,296 @@
+# bench.py
+"""
+Benchmarks for the Flask API. Each benchmark builds its own app via
+create_app() against a throwaway SQLite file (or the file given with
+--db), so it never touches instance/books.db.
+
+Usage:
+    python bench.py api --books 1000000 --users 5000 --invoices 50000 --db big.db
+    python bench.py api --db big.db --save before.json      # reuse the dataset
+    python bench.py api --db big.db --compare before.json   # after a change
+    python bench.py api --scenarios filter,book --requests 2000
+    python bench.py login --users 50 --requests 400 --concurrency 16
+    python bench.py login --workers 0          # inline hashing, for comparison
+    python bench.py serialize --rows 10000     # BookSchema.dump vs serializers.py
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from flask_jwt_extended import create_access_token
+from flask_migrate import upgrade
+from sqlalchemy import func, select
+from app import create_app
+from models import db, User, Book, BookFacetCount
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+API_SCENARIOS = ("filter", "book", "books", "login", "invoices")
+# GET /api/books returns the whole catalog, so it gets fewer requests
+FULL_DUMP_SHARE = 100
+
+
+def percentile(sorted_samples, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_samples:
+        return 0.0
+    k = max(0, min(len(sorted_samples) - 1, round(pct / 100 * len(sorted_samples)) - 1))
+    return sorted_samples[k]
+
+
+def run_concurrent(app, make_request, total, concurrency):
+    """
+    Issue 'total' requests from 'concurrency' threads, each with its own
+    test client. make_request(client, i) performs request i and returns the
+    response. Returns (elapsed seconds, latencies, status code counts).
+    """
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+    counter = iter(range(total))
+
+    def worker():
+        client = app.test_client()
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            start = time.perf_counter()
+            resp = make_request(client, i)
+            resp.get_data()  # streamed bodies are only produced when read
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                statuses[resp.status_code] = statuses.get(resp.status_code, 0) + 1
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - started, sorted(latencies), statuses
+
+
+def report(name, elapsed, latencies, statuses):
+    """Print one result line and return it as a dict (for --save/--compare)."""
+    n = len(latencies)
+    result = {
+        "requests": n,
+        "rps": n / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "statuses": {str(k): v for k, v in statuses.items()},
+    }
+    print(f"{name:<28} {result['rps']:8.1f} req/s   "
+          f"p50 {result['p50_ms']:7.1f}ms   "
+          f"p95 {result['p95_ms']:7.1f}ms   "
+          f"p99 {result['p99_ms']:7.1f}ms   "
+          f"status {statuses}")
+    return result
+
+
+def compare_results(results, baseline):
+    """Print throughput and p95 changes against a --save'd baseline."""
+    print("\nvs baseline:")
+    for name, now in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        rps = (now["rps"] / before["rps"] - 1) * 100 if before["rps"] else 0.0
+        p95 = (now["p95_ms"] / before["p95_ms"] - 1) * 100 if before["p95_ms"] else 0.0
+        print(f"{name:<28} throughput {rps:+6.1f}%   p95 {p95:+6.1f}%")
+
+
+def bench_login(users, requests, concurrency, workers, method):
+    """Login throughput with hashing inline (workers=0) or in the pool."""
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///" + os.path.join(tmp, "bench.db"),
+            "PASSWORD_HASH_WORKERS": workers,
+            "PASSWORD_HASH_METHOD": method,
+        })
+        with app.app_context():
+            from passwords import hash_password
+            db.create_all()
+            db.session.add_all([
+                User(username=f"bench{i}", password_hash=hash_password("secret"), role="user")
+                for i in range(users)
+            ])
+            db.session.commit()
+
+        def login(client, i):
+            return client.post("/api/login", json={
+                "username": f"bench{i % users}", "password": "secret",
+            })
+
+        elapsed, latencies, statuses = run_concurrent(app, login, requests, concurrency)
+        report(f"login (workers={workers})", elapsed, latencies, statuses)
+
+
+def bench_api(db_path, books, users, invoices, requests, concurrency, scenarios,
+              seed=0, save=None, compare=None):
+    """
+    Drive the main endpoints concurrently against a synthetic dataset.
+    With db_path, an existing file is reused as is (generate it once,
+    then compare versions on identical data); otherwise a temporary
+    database is generated with the given sizes.
+    """
+    from synthetic import generate_dataset, SYNTHETIC_PASSWORD
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.abspath(db_path or os.path.join(tmp, "bench.db"))
+        fresh = not os.path.exists(path)
+        app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///" + path})
+        with app.app_context():
+            upgrade(directory=MIGRATIONS_DIR)
+            if fresh:
+                started = time.perf_counter()
+                result = generate_dataset(books=books, users=users, invoices=invoices, seed=seed)
+                print(f"generated {result['books']} books, {result['users']} users, "
+                      f"{result['invoices']} invoices in {time.perf_counter() - started:.1f}s")
+
+            n_books = db.session.scalar(select(func.max(Book.id))) or 0
+            n_users = db.session.scalar(select(func.max(User.id))) or 0
+            publishers = db.session.scalars(select(BookFacetCount.publisher).distinct()).all()
+            levels = db.session.scalars(select(BookFacetCount.level).distinct()).all()
+            tokens = [create_access_token(identity=str(uid)) for uid in range(1, min(n_users, 32) + 1)]
+        if not n_books or not n_users:
+            raise SystemExit("the dataset needs at least one book and one user")
+
+        def pick(seq, i):
+            return seq[i % len(seq)] if seq else ""
+
+        filter_queries = [
+            lambda i: "page=1&limit=20",
+            lambda i: f"page={1 + i % 50}&limit=20&sort=price",
+            lambda i: f"publisher_in={pick(publishers, i)}&level_in={pick(levels, i)}&sort=price",
+            lambda i: f"subject={pick(['math', 'english', 'science', 'kiswahili', 'grade'], i)}",
+            lambda i: "after=&sort=price&direction=desc&limit=50",
+            lambda i: f"min_price={100 * (i % 20)}&max_price={100 * (i % 20) + 300}&count=none",
+            lambda i: f"status=APPROVED&level_in={pick(levels, i)}",
+        ]
+
+        def filter_request(client, i):
+            return client.get("/api/filter?" + filter_queries[i % len(filter_queries)](i))
+
+        def book_request(client, i):
+            return client.get(f"/api/books/{1 + (i * 7919) % n_books}")
+
+        def books_request(client, i):
+            return client.get("/api/books?format=ndjson")
+
+        def login_request(client, i):
+            username = "admin" if n_users == 1 else f"user{2 + i % (n_users - 1)}"
+            return client.post("/api/login", json={"username": username,
+                                                   "password": SYNTHETIC_PASSWORD})
+
+        def invoices_request(client, i):
+            headers = {"Authorization": "Bearer " + tokens[i % len(tokens)]}
+            if i % 2:
+                return client.get("/api/invoices?limit=20", headers=headers)
+            rng = random.Random(i)
+            book_ids = [rng.randint(1, n_books) for _ in range(rng.randint(1, 5))]
+            return client.post("/api/invoices", headers=headers, json={
+                "book_ids": book_ids, "quantities": [rng.randint(1, 3) for _ in book_ids],
+            })
+
+        makers = {
+            "filter": filter_request,
+            "book": book_request,
+            "books": books_request,
+            "login": login_request,
+            "invoices": invoices_request,
+        }
+        print(f"{n_books} books, {n_users} users, concurrency {concurrency}")
+        results = {}
+        for name in scenarios:
+            total = max(1, requests // FULL_DUMP_SHARE) if name == "books" else requests
+            elapsed, latencies, statuses = run_concurrent(app, makers[name], total, concurrency)
+            results[name] = report(name, elapsed, latencies, statuses)
+
+    if save:
+        with open(save, "w") as f:
+            json.dump(results, f, indent=2)
+    if compare:
+        with open(compare) as f:
+            compare_results(results, json.load(f))
+    return results
+
+
+def bench_serialize(rows, repeat):
+    """
+    JSON-encode 'rows' books the old way (ORM objects through
+    BookSchema.dump + json.dumps) and the new way (column tuples through
+    serializers.book_row + serializers.dumps). Best of 'repeat' runs.
+    """
+    from schemas import BookSchema
+    from serializers import BOOK_FIELDS, book_row, dumps, orjson
+
+    tuples = [
+        (i, "KENYA LITERATURE BUREAU", "pp1", None, f"Book {i}", 100.0 + i, "APPROVED")
+        for i in range(rows)
+    ]
+    books = [Book(**dict(zip(BOOK_FIELDS, t))) for t in tuples]
+    schema = BookSchema(many=True)
+
+    def best(fn):
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    old = best(lambda: json.dumps(schema.dump(books)))
+    new = best(lambda: dumps([book_row(t) for t in tuples]))
+    encoder = "orjson" if orjson is not None else "stdlib json"
+    print(f"{'BookSchema.dump + json':<28} {rows / old:10.0f} rows/s")
+    print(f"{'book_row + ' + encoder:<28} {rows / new:10.0f} rows/s   ({old / new:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tanami API benchmarks")
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    p = sub.add_parser("login", help="POST /api/login throughput under concurrency")
+    p.add_argument("--users", type=int, default=50)
+    p.add_argument("--requests", type=int, default=400)
+    p.add_argument("--concurrency", type=int, default=16)
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                   help="password hashing processes (0 = inline)")
+    p.add_argument("--method", default="scrypt:32768:8:1")
+
+    p = sub.add_parser("api", help="filter/books/login/invoices under concurrency")
+    p.add_argument("--db", help="SQLite file to use; generated if missing, reused if present")
+    p.add_argument("--books", type=int, default=100_000)
+    p.add_argument("--users", type=int, default=1_000)
+    p.add_argument("--invoices", type=int, default=10_000)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--requests", type=int, default=500, help="per scenario")
+    p.add_argument("--concurrency", type=int, default=16)
+    p.add_argument("--scenarios", default=",".join(API_SCENARIOS),
+                   help="comma-separated subset of " + ",".join(API_SCENARIOS))
+    p.add_argument("--save", help="write the results as JSON")
+    p.add_argument("--compare", help="results JSON from an earlier --save")
+
+    p = sub.add_parser("serialize", help="book list serialization, no HTTP or DB")
+    p.add_argument("--rows", type=int, default=10000)
+    p.add_argument("--repeat", type=int, default=5)
+
+    args = parser.parse_args()
+    if args.bench == "login":
+        bench_login(args.users, args.requests, args.concurrency, args.workers, args.method)
+    elif args.bench == "api":
+        scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+        unknown = set(scenarios) - set(API_SCENARIOS)
+        if unknown:
+            parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+        bench_api(args.db, args.books, args.users, args.invoices, args.requests,
+                  args.concurrency, scenarios, args.seed, args.save, args.compare)
+    elif args.bench == "serialize":
+        bench_serialize(args.rows, args.repeat)
@@ -0,0 +1,57 @@
+# cache.py
+"""
+Small in-process caches shared by the route modules.
+Each worker process has its own copy, so anything cached here must either
+be invalidated by the routes that change it or be safe to serve slightly
+stale until its TTL runs out.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    A bounded, thread-safe LRU cache whose entries expire after 'ttl' seconds.
+    Usage:
+        counts = TTLCache(maxsize=256, ttl=30)
+        counts.set(key, 42)
+        counts.get(key)  # -> 42, or None once expired/evicted
+    """
+
+    def __init__(self, maxsize=256, ttl=60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return default if entry is None else entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
@@ -0,0 +1,101 @@
+# catalog.py
+"""
+Catalog versioning for conditional GETs.
+
+The books table only changes through the admin routes (and the import
+commands), and each of those calls bump_catalog_version() inside the same
+transaction as the change. Read endpoints decorated with @catalog_etag
+derive an ETag from that version, so a client that already holds the
+current payload gets a bodyless 304 without the query ever running.
+"""
+import hashlib
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import request, make_response
+from sqlalchemy import select, update
+from werkzeug.http import is_resource_modified
+from models import db, CatalogState
+
+STATE_ID = 1
+
+
+def get_catalog_version():
+    """Return (version, updated_at) for the catalog; (0, None) if never set."""
+    state = db.session.get(CatalogState, STATE_ID)
+    if state is None:
+        return 0, None
+    return state.version, state.updated_at
+
+
+def catalog_version_column():
+    """
+    The catalog version as a scalar subquery, for reading it in the same
+    statement (and so the same snapshot) as the rows it describes; NULL
+    if never set.
+    """
+    return (select(CatalogState.version)
+            .where(CatalogState.id == STATE_ID)
+            .scalar_subquery())
+
+
+def bump_catalog_version():
+    """
+    Mark the catalog as changed. Call before committing the book change so
+    both land in the same transaction.
+    """
+    now = datetime.utcnow()
+    result = db.session.execute(
+        update(CatalogState)
+        .where(CatalogState.id == STATE_ID)
+        .values(version=CatalogState.version + 1, updated_at=now)
+    )
+    if result.rowcount == 0:
+        db.session.add(CatalogState(id=STATE_ID, version=1, updated_at=now))
+
+
+def _last_modified(updated_at):
+    """
+    Last-Modified for a catalog changed at 'updated_at', or None while it
+    would be ambiguous. HTTP dates have whole seconds, so it is the next
+    whole second after the change, and is only given out once that
+    second has passed: a later change then always gets a later value, and
+    an If-Modified-Since can never match a catalog that changed again
+    within the same second. Until then clients revalidate by ETag alone.
+    """
+    if updated_at is None:
+        return None
+    last_modified = updated_at.replace(microsecond=0) + timedelta(seconds=1)
+    return last_modified if datetime.utcnow() >= last_modified else None
+
+
+def catalog_etag(view):
+    """
+    Decorator for public catalog reads. Answers 304 Not Modified when the
+    client's If-None-Match / If-Modified-Since is still current, otherwise
+    runs the view and tags a 200 response with ETag and Last-Modified.
+    A view whose answer may lag the catalog version (e.g. from an
+    in-memory index still rebuilding) marks it Cache-Control: no-store,
+    and it is sent without validators.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        version, updated_at = get_catalog_version()
+        # Different URLs/query strings are different representations
+        key = f"{version}:{request.full_path}".encode("utf-8")
+        etag = hashlib.sha1(key).hexdigest()[:20]
+        last_modified = _last_modified(updated_at)
+
+        if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+            resp = make_response("", 304)
+        else:
+            resp = make_response(view(*args, **kwargs))
+            if resp.status_code != 200 or resp.cache_control.no_store:
+                return resp
+
+        resp.set_etag(etag)
+        if last_modified:
+            resp.last_modified = last_modified
+        # Let browsers keep the body but revalidate before every use
+        resp.cache_control.no_cache = True
+        return resp
+    return wrapper
@@ -1,9 +1,12 @@
 # commands.py
-import json
-from flask import current_app
+import os
+import sys
+import click
 from flask.cli import AppGroup
-from models import Book, db
-from math import isnan
+from importer import import_books, upsert_books, DEFAULT_BATCH_SIZE
+
+# The PDF tooling lives in ../pdf, next to this server package
+PDF_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "pdf")
 
 cli = AppGroup("custom")
 
@@ -16,16 +19,12 @@ def seed_data():
     """
     print("Seeding data from books.json ...")
     try:
-        with open("books.json", "r", encoding="utf-8") as f:
-            data = json.load(f)
+        f = open("books.json", "r", encoding="utf-8")
     except FileNotFoundError:
         print("books.json not found!")
         return
 
-    # Clear old data
-    Book.query.delete()
-
-    # data is expected to be an array of objects in the new structure:
+    # Replaces the whole catalog. books.json may be either shape:
     # [
     #   {
     #       "publisher": "KENYA LITERATURE BUREAU",
@@ -36,32 +35,98 @@ def seed_data():
     #       "PP2": [ ... ],
     #       ...
     #   },
-    #   {
-    #       "publisher": "LONGHORN",
-    #       "PP1": [ ... ],
-    #       ...
-    #   }
+    #   ...
     # ]
+    # or [{"publisher": "...", "level": "pp1", "items": [ ... ]}, ...]
+    with f:
+        result = import_books(f, replace=True)
+    print(f"Seeding complete! {result['inserted']} books ({result['skipped']} skipped)")
+
+
+@cli.command("import-books")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--append", is_flag=True,
+              help="Add to the catalog instead of replacing it.")
+@click.option("--batch-size", default=DEFAULT_BATCH_SIZE, show_default=True,
+              help="Rows per INSERT batch.")
+def import_books_command(path, append, batch_size):
+    """
+    Bulk-load a publisher price list (books.json format).
+    Usage:
+        flask custom import-books books.json
+        flask custom import-books new_titles.json --append
+    """
+    def report(inserted, skipped):
+        click.echo(f"  ... {inserted} inserted, {skipped} skipped")
+
+    with open(path, "r", encoding="utf-8") as f:
+        result = import_books(f, replace=not append, batch_size=batch_size, progress=report)
+    click.echo(f"Import complete! {result['inserted']} books ({result['skipped']} skipped)")
+
+
+@cli.command("import-pdf")
+@click.argument("pdf_path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--cache-dir", default=".pdf_cache", show_default=True,
+              help="Where parsed pages are cached, keyed by content hash.")
+def import_pdf_command(pdf_path, cache_dir):
+    """
+    Parse a publisher price-list PDF and upsert its books.
+    Pages unchanged since the last run come from the cache, and only
+    books whose isbn/price/status changed are written.
+    Usage:
+        flask custom import-pdf ../pdf/example.pdf
+    """
+    if PDF_DIR not in sys.path:
+        sys.path.insert(0, PDF_DIR)
+    from catalog_pipeline import extract_catalog
 
-    for publisher_obj in data:
-        publisher_name = publisher_obj.get("publisher", "UNKNOWN")
-        for key, val in publisher_obj.items():
-            if key == "publisher":
-                continue
-            level_name = key  # e.g. "PP1", "GRADE1", etc.
-            if isinstance(val, list):
-                for item in val:
-                    new_book = Book(
-                        publisher=publisher_name,
-                        level=level_name,
-                        isbn=item.get("isbn"),
-                        title=item["title"],
-                        price=item.get("price"),
-                        status=item.get("status")
-                    )
-                    db.session.add(new_book)
+    rows, stats = extract_catalog(pdf_path, cache_dir)
+    click.echo(f"Parsed {stats['pages']} pages ({stats['parsed']} parsed, "
+               f"{stats['cached']} from cache): {len(rows)} books")
+
+    result = upsert_books(rows)
+    click.echo(f"Import complete! {result['inserted']} inserted, "
+               f"{result['updated']} updated, {result['unchanged']} unchanged")
+
+
+@cli.command("rebuild-rollups")
+def rebuild_rollups_command():
+    """
+    Recompute the sales rollups from every invoice item, e.g. after
+    the migration that adds them or after editing invoices by hand.
+    Usage:
+        flask custom rebuild-rollups
+    """
+    from models import db
+    from rollups import rebuild_sales_rollups
+
+    rebuild_sales_rollups()
     db.session.commit()
-    print("Seeding complete!")
+    click.echo("Sales rollups rebuilt.")
+
+
+@cli.command("generate-data")
+@click.option("--books", default=100_000, show_default=True)
+@click.option("--users", default=1_000, show_default=True)
+@click.option("--invoices", default=10_000, show_default=True)
+@click.option("--seed", default=0, show_default=True, help="Same seed, same data.")
+@click.confirmation_option(prompt="This deletes all books, users and invoices. Continue?")
+def generate_data_command(books, users, invoices, seed):
+    """
+    Replace the database with a synthetic dataset for benchmarking
+    (every user's password is 'password', user 1 is 'admin').
+    Usage:
+        flask custom generate-data --books 1000000 --users 5000 --invoices 50000 --yes
+    """
+    from synthetic import generate_dataset
+
+    def report(table, written):
+        click.echo(f"  ... {table}: {written}")
+
+    result = generate_dataset(books=books, users=users, invoices=invoices,
+                              seed=seed, progress=report)
+    click.echo(f"Generated {result['books']} books, {result['users']} users, "
+               f"{result['invoices']} invoices ({result['invoice_items']} items)")
 
 
 def init_app(app):
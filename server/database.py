@@ -0,0 +1,140 @@
+# database.py
+"""
+Database engine setup.
+
+The URL comes from SQLALCHEMY_DATABASE_URI, which create_app fills from
+(lowest to highest priority) the built-in default, instance/settings.py,
+the DATABASE_URL environment variable and create_app's 'config' dict.
+
+SQLite connections get these PRAGMAs as they are opened:
+
+    SQLITE_JOURNAL_MODE   "wal": readers no longer block the writer (and
+                          vice versa); None leaves the file's mode alone
+    SQLITE_SYNCHRONOUS    "normal" is durable enough in WAL mode and
+                          avoids an fsync per commit
+    SQLITE_BUSY_TIMEOUT   ms a writer waits for the lock before raising
+                          "database is locked"
+    SQLITE_CACHE_SIZE     page cache per connection; negative = KiB
+
+Other backends get a sized connection pool:
+
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT (s), DB_POOL_RECYCLE (s),
+    DB_POOL_PRE_PING
+"""
+from sqlalchemy import event, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.engine import make_url
+from models import db
+
+# Dialects whose insert() has on_conflict_do_update
+_UPSERT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+DEFAULTS = {
+    "SQLITE_JOURNAL_MODE": "wal",
+    "SQLITE_SYNCHRONOUS": "normal",
+    "SQLITE_BUSY_TIMEOUT": 5000,
+    "SQLITE_CACHE_SIZE": -20000,
+    "DB_POOL_SIZE": 10,
+    "DB_MAX_OVERFLOW": 20,
+    "DB_POOL_TIMEOUT": 30,
+    "DB_POOL_RECYCLE": 1800,
+    "DB_POOL_PRE_PING": True,
+}
+
+
+def init_app(app):
+    """Apply the database config to the app and bind the shared db to it."""
+    for key, value in DEFAULTS.items():
+        app.config.setdefault(key, value)
+
+    uri = app.config["SQLALCHEMY_DATABASE_URI"]
+    if uri.startswith("postgres://"):
+        # Old-style scheme some hosts still hand out; SQLAlchemy wants postgresql://
+        uri = app.config["SQLALCHEMY_DATABASE_URI"] = "postgresql://" + uri[len("postgres://"):]
+
+    options = app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", {})
+    if make_url(uri).get_backend_name() != "sqlite":
+        options.setdefault("pool_size", app.config["DB_POOL_SIZE"])
+        options.setdefault("max_overflow", app.config["DB_MAX_OVERFLOW"])
+        options.setdefault("pool_timeout", app.config["DB_POOL_TIMEOUT"])
+        options.setdefault("pool_recycle", app.config["DB_POOL_RECYCLE"])
+        options.setdefault("pool_pre_ping", app.config["DB_POOL_PRE_PING"])
+
+    db.init_app(app)
+
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == "sqlite":
+                event.listen(engine, "connect", _sqlite_pragmas(app.config))
+
+
+def _sqlite_pragmas(config):
+    statements = [f"PRAGMA busy_timeout = {int(config['SQLITE_BUSY_TIMEOUT'])}",
+                  f"PRAGMA cache_size = {int(config['SQLITE_CACHE_SIZE'])}"]
+    if config["SQLITE_SYNCHRONOUS"]:
+        statements.append(f"PRAGMA synchronous = {config['SQLITE_SYNCHRONOUS']}")
+    if config["SQLITE_JOURNAL_MODE"]:
+        statements.append(f"PRAGMA journal_mode = {config['SQLITE_JOURNAL_MODE']}")
+
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+    return on_connect
+
+
+def insert_or_increment(model, keys, increments):
+    """
+    Insert a row of 'model' with primary key 'keys' and 'increments' as
+    its values, or, if that row exists, add 'increments' to it, so two
+    transactions creating the same row at once both land instead of one
+    failing on the key.
+    Example: insert_or_increment(BookFacetCount,
+                                 {"publisher": "KLB", "level": "pp1", "status": ""},
+                                 {"count": 1})
+    """
+    insert_or_increment_many(model, list(keys), [{**keys, **increments}])
+
+
+def insert_or_increment_many(model, key_columns, rows):
+    """
+    insert_or_increment for several rows: each row is a dict of the
+    'key_columns' plus the columns to add to (the same ones in every row,
+    and no two rows with the same key).
+
+    SQLite and PostgreSQL get one INSERT ... ON CONFLICT DO UPDATE,
+    executed for all rows at once. Other databases get an UPDATE per row
+    and, where no row matched, an INSERT in a savepoint; if another
+    transaction inserted that key first, the UPDATE is tried once more.
+    """
+    if not rows:
+        return
+    table = model.__table__
+    increments = [col for col in rows[0] if col not in key_columns]
+    dialect = db.session.get_bind(mapper=model).dialect.name
+    if dialect in _UPSERT_INSERTS:
+        stmt = _UPSERT_INSERTS[dialect](table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key_columns),
+            set_={col: table.c[col] + stmt.excluded[col] for col in increments},
+        )
+        db.session.execute(stmt, rows)
+        return
+
+    for row in rows:
+        where = [table.c[col] == row[col] for col in key_columns]
+        add = {col: table.c[col] + row[col] for col in increments}
+        for attempt in range(2):
+            if db.session.execute(update(table).where(*where).values(add)).rowcount:
+                break
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(insert(table).values(row))
+                break
+            except IntegrityError:
+                if attempt:
+                    raise
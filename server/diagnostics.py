@@ -0,0 +1,163 @@
+# diagnostics.py
+"""
+Opt-in query diagnostics for development and staging.
+
+With DIAGNOSTICS_ENABLED set, two checks run on every SQL statement
+(via engine before/after_cursor_execute events):
+
+  slow queries  statements slower than SLOW_QUERY_MS are logged with
+                their parameters, route, call site and, if
+                SLOW_QUERY_EXPLAIN is on, their EXPLAIN (QUERY PLAN)
+  N+1           a request that runs the same statement shape at least
+                NPLUSONE_THRESHOLD times (e.g. one SELECT per row of a
+                list) is logged once per shape when it finishes, with
+                the route and the call site of the first occurrence
+
+"Same shape" means equal after literals are replaced by ? and IN lists
+are collapsed, so "WHERE id IN (?, ?)" and "WHERE id IN (?, ?, ?)" match.
+The call site is the innermost frame in this package's own modules.
+
+Findings go to the "diagnostics" logger at WARNING level.
+"""
+import logging
+import os
+import re
+import sys
+import time
+from collections import Counter
+from flask import g, has_app_context, has_request_context, request
+from sqlalchemy import event
+from models import db
+
+logger = logging.getLogger("diagnostics")
+
+DEFAULTS = {
+    "DIAGNOSTICS_ENABLED": False,
+    "SLOW_QUERY_MS": 100,
+    "SLOW_QUERY_EXPLAIN": True,
+    "NPLUSONE_THRESHOLD": 5,
+}
+
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+_START = "diagnostics_start"
+_EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE")
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM_LIST = re.compile(r"\(\s*(?:\?|%s|:\w+)(?:\s*,\s*(?:\?|%s|:\w+))*\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+def init_app(app):
+    """Install the slow-query and N+1 hooks when DIAGNOSTICS_ENABLED is set."""
+    for key, value in DEFAULTS.items():
+        app.config.setdefault(key, value)
+    if not app.config["DIAGNOSTICS_ENABLED"]:
+        return
+
+    slow_seconds = app.config["SLOW_QUERY_MS"] / 1000.0
+    explain = app.config["SLOW_QUERY_EXPLAIN"]
+    threshold = app.config["NPLUSONE_THRESHOLD"]
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info[_START] = time.perf_counter()
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info.pop(_START, None)
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        if elapsed >= slow_seconds:
+            _log_slow_query(conn, cursor, statement, parameters, executemany, elapsed, explain)
+        if has_app_context():
+            seen = g.get("_diagnostics")
+            if seen is not None:
+                shape = normalize_statement(statement)
+                seen["counts"][shape] += 1
+                if shape not in seen["sites"]:
+                    seen["sites"][shape] = call_site()
+
+    def start_request():
+        g._diagnostics = {"counts": Counter(), "sites": {}}
+
+    def finish_request(response):
+        seen = g.pop("_diagnostics", None)
+        if seen is None:
+            return response
+        route = _route()
+
+        def report():
+            for shape, count in seen["counts"].items():
+                if count >= threshold:
+                    logger.warning("Possible N+1 in %s: %d x %s (first from %s)",
+                                   route, count, shape, seen["sites"].get(shape))
+
+        if response.is_streamed:
+            response.call_on_close(report)
+        else:
+            report()
+        return response
+
+    app.before_request(start_request)
+    app.after_request(finish_request)
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, "before_cursor_execute", before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", after_cursor_execute)
+
+
+def normalize_statement(statement):
+    """
+    Reduce a statement to its shape: literals -> ?, IN lists -> (?...),
+    whitespace collapsed.
+    Example: normalize_statement("SELECT * FROM books WHERE id IN (1, 2)")
+             -> "SELECT * FROM books WHERE id IN (?...)"
+    """
+    shape = _STRING.sub("?", statement)
+    shape = _NUMBER.sub("?", shape)
+    shape = _PARAM_LIST.sub("(?...)", shape)
+    return _SPACE.sub(" ", shape).strip()
+
+
+def call_site():
+    """'file.py:line in function' of the innermost frame in this package."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(_PACKAGE_DIR) and not filename.endswith("diagnostics.py"):
+            return f"{os.path.relpath(filename, _PACKAGE_DIR)}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "unknown"
+
+
+def _route():
+    if has_request_context():
+        return f"{request.method} {request.path} ({request.endpoint or 'unmatched'})"
+    return "no request"
+
+
+def _log_slow_query(conn, cursor, statement, parameters, executemany, elapsed, explain):
+    plan = None
+    if explain and not executemany and statement.lstrip().upper().startswith(_EXPLAINABLE):
+        plan = _explain(conn, cursor, statement, parameters)
+    logger.warning(
+        "Slow query (%.1f ms) in %s from %s:\n%s\nparams: %r%s",
+        elapsed * 1000, _route(), call_site(), statement,
+        parameters if not executemany else f"<{len(parameters)} rows>",
+        f"\nplan:\n{plan}" if plan else "",
+    )
+
+
+def _explain(conn, cursor, statement, parameters):
+    # A second cursor on the same DBAPI connection, so the slow statement's
+    # own results are left untouched
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    explain_cursor = cursor.connection.cursor()
+    try:
+        explain_cursor.execute(prefix + statement, parameters)
+        return "\n".join("  " + " | ".join(str(col) for col in row)
+                         for row in explain_cursor.fetchall())
+    except Exception as e:
+        return f"  (EXPLAIN failed: {e})"
+    finally:
+        explain_cursor.close()
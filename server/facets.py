@@ -0,0 +1,123 @@
+# facets.py
+"""
+Facet counts (books per publisher / level / status).
+
+book_facet_counts holds one row per (publisher, level, status) combination
+that exists in the catalog. The book routes adjust it in the same
+transaction as each change, so facet queries read a table whose size is
+the number of distinct combinations rather than the number of books.
+"""
+from sqlalchemy import func, update, delete, insert, select
+from models import db, Book, BookFacetCount
+from database import insert_or_increment
+
+FACETS = ("publisher", "level", "status")
+
+# The /api/filter arg holding each facet's exact selection
+FACET_FILTER_ARGS = {
+    "publisher": "publisher_in",
+    "level": "level_in",
+    "status": "status",
+}
+
+# Filters the aggregate table can answer; anything else needs the books table
+AGGREGATE_FILTERS = set(FACET_FILTER_ARGS.values())
+
+
+def facet_key(book):
+    """The (publisher, level, status) combination a book counts towards."""
+    return (book.publisher or "", book.level or "", book.status or "")
+
+
+def move_facet_counts(old_key, new_key):
+    """
+    Move one book from old_key to new_key (either may be None for
+    create/delete). Call before committing the book change.
+    """
+    if old_key == new_key:
+        return
+    if old_key is not None:
+        _adjust(old_key, -1)
+    if new_key is not None:
+        _adjust(new_key, +1)
+
+
+def add_facet_counts(deltas):
+    """Apply a {facet_key: delta} mapping (e.g. a Counter from a bulk insert)."""
+    for key, delta in deltas.items():
+        if delta:
+            _adjust(key, delta)
+
+
+def _adjust(key, delta):
+    publisher, level, status = key
+    if delta > 0:
+        # Upsert, so two first books of a new combination cannot collide
+        insert_or_increment(
+            BookFacetCount,
+            {"publisher": publisher, "level": level, "status": status},
+            {"count": delta},
+        )
+        return
+    match = (
+        (BookFacetCount.publisher == publisher)
+        & (BookFacetCount.level == level)
+        & (BookFacetCount.status == status)
+    )
+    db.session.execute(
+        update(BookFacetCount).where(match).values(count=BookFacetCount.count + delta)
+    )
+    db.session.execute(delete(BookFacetCount).where(match, BookFacetCount.count <= 0))
+
+
+def rebuild_facet_counts():
+    """Recompute every aggregate from the books table (after bulk loads)."""
+    cols = [func.coalesce(getattr(Book, f), "") for f in FACETS]
+    db.session.execute(delete(BookFacetCount))
+    db.session.execute(
+        insert(BookFacetCount).from_select(
+            ["publisher", "level", "status", "count"],
+            select(*cols, func.count()).group_by(*cols),
+        )
+    )
+
+
+def can_use_aggregates(filters):
+    """True if every active filter is an exact facet selection."""
+    return not any(v not in (None, "", ()) for k, v in filters.items()
+                   if k not in AGGREGATE_FILTERS)
+
+
+def counts_from_aggregates(filters):
+    """
+    Facet counts from book_facet_counts. Each facet is counted with the
+    other facets' selections applied but not its own, so a picker keeps
+    showing the alternatives to what is already ticked.
+    """
+    result = {}
+    for facet in FACETS:
+        col = getattr(BookFacetCount, facet)
+        stmt = select(col, func.sum(BookFacetCount.count)).group_by(col)
+        for other, arg in FACET_FILTER_ARGS.items():
+            if other != facet and filters.get(arg):
+                stmt = stmt.where(getattr(BookFacetCount, other).in_(filters[arg]))
+        result[facet] = _as_list(db.session.execute(stmt))
+    return result
+
+
+def counts_from_query(q, facet):
+    """Facet counts for one facet over an arbitrary filtered Book query."""
+    col = getattr(Book, facet)
+    rows = db.session.execute(
+        q.order_by(None).with_entities(col, func.count()).group_by(col).statement
+    )
+    return _as_list(rows)
+
+
+def _as_list(rows):
+    # Merge '' and NULL, then sort by count desc, value asc
+    merged = {}
+    for value, n in rows:
+        merged[value or ""] = merged.get(value or "", 0) + int(n)
+    items = sorted(merged.items(), key=lambda kv: (-kv[1], kv[0]))
+    return [{"value": v or None, "count": n} for v, n in items if n > 0]
@@ -0,0 +1,118 @@
+# fuzzy.py
+"""
+Typo-tolerant title search with an in-memory trigram index.
+
+Every title is split into lowercase words, each padded as "  word " and
+cut into 3-character trigrams (the pg_trgm scheme), and the index maps
+trigram -> ids of the books containing it. A search only touches the
+postings of the query's own trigrams, so "skillgrow langauge" still
+shares most trigrams with "KLB skillgrow language activities" and is
+ranked by similarity without scanning the books table.
+
+Score: the share of the query's trigrams found in the title, with the
+Jaccard similarity of the two trigram sets breaking ties (so shorter,
+closer titles win).
+
+There is one index per app and process, built in the background at
+startup and kept current as described in memindex.py: the book routes
+call title_index().update() after committing, and other changes are
+picked up by a background rebuild while searches keep using the
+previous index.
+"""
+from collections import Counter, defaultdict
+from models import Book
+from memindex import VersionedIndex
+from search import words
+
+FUZZY_MIN_SCORE = 0.5
+FUZZY_MAX_RESULTS = 500
+
+
+def trigrams(text):
+    """
+    The set of trigrams of 'text'.
+    Example: trigrams("Cat") -> {"  c", " ca", "cat", "at "}
+    """
+    grams = set()
+    for word in words(text):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class _Trigrams:
+    """trigram -> book ids, plus each book's trigram set."""
+
+    def __init__(self):
+        self.postings = defaultdict(set)
+        self.grams = {}
+
+    def add(self, book_id, title):
+        grams = trigrams(title)
+        self.grams[book_id] = grams
+        for gram in grams:
+            self.postings[gram].add(book_id)
+
+    def remove(self, book_id):
+        for gram in self.grams.pop(book_id, ()):
+            ids = self.postings.get(gram)
+            if ids is not None:
+                ids.discard(book_id)
+                if not ids:
+                    del self.postings[gram]
+
+
+class TrigramIndex(VersionedIndex):
+    """Book titles by trigram. Thread-safe."""
+
+    extension = "title_index"
+    columns = (Book.id, Book.title)
+
+    def __len__(self):
+        data = self._data
+        return len(data.grams) if data is not None else 0
+
+    def search(self, term, limit=FUZZY_MAX_RESULTS, min_score=FUZZY_MIN_SCORE):
+        """
+        Best-matching book ids for 'term' as [(book_id, score), ...],
+        highest score first.
+        """
+        query = trigrams(term)
+        if not query:
+            return []
+        data = self._current()
+        if data is None:
+            return []
+
+        with self._lock:
+            shared = Counter()
+            for gram in query:
+                shared.update(data.postings.get(gram, ()))
+            scored = []
+            for book_id, n in shared.items():
+                coverage = n / len(query)
+                if coverage >= min_score:
+                    jaccard = n / (len(query) + len(data.grams[book_id]) - n)
+                    scored.append((coverage, jaccard, book_id))
+        scored.sort(key=lambda s: (-s[0], -s[1], s[2]))
+        return [(book_id, round(coverage, 3)) for coverage, _, book_id in scored[:limit]]
+
+    def update(self, book_id, title=None):
+        """Reflect a committed create/update (title given) or delete (None)."""
+        super().update(book_id, title)
+
+    def _load(self, rows):
+        data = _Trigrams()
+        for book_id, title in rows:
+            data.add(book_id, title)
+        return data
+
+    def _apply(self, data, book_id, title):
+        data.remove(book_id)
+        if title is not None:
+            data.add(book_id, title)
+
+
+def title_index():
+    """The current app's TrigramIndex."""
+    return TrigramIndex.for_app()
@@ -0,0 +1,265 @@
+# importer.py
+"""
+Bulk catalog import.
+
+Reads a books.json-style file incrementally (one publisher block at a
+time, never the whole document) and inserts rows with batched Core
+INSERTs instead of one ORM object per book. Both shapes used in this repo
+are accepted:
+
+  flat:   [{"publisher": "LONGHORN", "level": "pp1", "items": [{...}, ...]}, ...]
+  nested: [{"publisher": "LONGHORN", "PP1": [{...}, ...], "PP2": [...]}, ...]
+
+Used by `flask custom import-books`, `flask custom seed-data`, seed.py
+and POST /api/books/import. upsert_books() is the incremental path used by
+`flask custom import-pdf`: it writes only the books that changed.
+"""
+import json
+import math
+from datetime import datetime
+from collections import Counter
+from sqlalchemy import insert, update, delete, select, or_
+from models import db, Book
+from catalog import bump_catalog_version
+from facets import rebuild_facet_counts, add_facet_counts
+from prices import record_prices, record_initial_prices, clear_price_history
+
+DEFAULT_BATCH_SIZE = 1000
+READ_CHUNK_SIZE = 64 * 1024
+
+BOOK_FIELDS = ("isbn", "title", "price", "status")
+
+
+def iter_json_array(fp, chunk_size=READ_CHUNK_SIZE):
+    """
+    Yield the elements of a top-level JSON array from a text file object,
+    reading it chunk_size characters at a time. Raises ValueError if the
+    document is not one well-formed array (trailing data included).
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    eof = False
+    expect = "["  # then: value/']' -> ','/']' -> value -> ... -> end
+
+    while True:
+        # Skip whitespace, refilling the buffer as needed
+        while True:
+            while pos < len(buf) and buf[pos].isspace():
+                pos += 1
+            if pos < len(buf) or eof:
+                break
+            chunk = fp.read(chunk_size)
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+
+        if expect == "end":
+            if pos < len(buf):
+                raise ValueError("Unexpected data after the JSON array")
+            return
+        if pos >= len(buf):
+            raise ValueError("Unexpected end of JSON input")
+
+        ch = buf[pos]
+        if expect == "[":
+            if ch != "[":
+                raise ValueError("Expected a JSON array of publisher blocks")
+            pos += 1
+            expect = "value_or_end"
+        elif expect in ("value_or_end", "sep_or_end") and ch == "]":
+            pos += 1
+            expect = "end"
+        elif expect == "sep_or_end":
+            if ch != ",":
+                raise ValueError(f"Expected ',' or ']' at offset {pos}")
+            pos += 1
+            expect = "value"
+        else:
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                obj, end = None, None
+            # A value touching the end of the buffer may be cut short
+            if end is None or (end >= len(buf) and not eof):
+                if eof:
+                    raise ValueError(f"Invalid JSON at offset {pos}")
+                # Decode again only once the pending text has doubled, so a
+                # value spanning many chunks is re-scanned O(log n) times
+                # rather than once per chunk
+                chunks = [buf[pos:]]
+                size = len(chunks[0])
+                target = 2 * size
+                while size < target:
+                    chunk = fp.read(chunk_size)
+                    if not chunk:
+                        eof = True
+                        break
+                    chunks.append(chunk)
+                    size += len(chunk)
+                buf, pos = "".join(chunks), 0
+                continue
+            yield obj
+            # Drop what has been consumed so the buffer stays small
+            buf, pos = buf[end:], 0
+            expect = "sep_or_end"
+
+
+def iter_book_rows(blocks):
+    """
+    Flatten publisher blocks (either shape) into dicts ready for
+    insert(Book). Yields None for items that have no title.
+    """
+    for block in blocks:
+        if not isinstance(block, dict):
+            continue
+        publisher_name = block.get("publisher", "UNKNOWN")
+        if isinstance(block.get("items"), list):
+            groups = [(block.get("level"), block["items"])]
+        else:
+            groups = [(key, val) for key, val in block.items()
+                      if key != "publisher" and isinstance(val, list)]
+
+        for level_name, items in groups:
+            for item in items:
+                if not isinstance(item, dict) or not item.get("title"):
+                    yield None
+                    continue
+                row = {field: item.get(field) for field in BOOK_FIELDS}
+                row["publisher"] = publisher_name
+                row["level"] = level_name
+                row["price"] = _clean_price(row["price"])
+                yield row
+
+
+def _clean_price(value):
+    # Spreadsheet exports leave NaN or strings in the price column
+    try:
+        price = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(price) else price
+
+
+def import_books(fp, replace=True, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """
+    Load books from the JSON file object 'fp'.
+
+    replace=True wipes the table first and loads everything in a single
+    transaction, so readers never see a half-loaded catalog.
+    replace=False appends and commits after every batch, releasing the
+    write lock between batches.
+
+    progress, if given, is called as progress(inserted, skipped) after
+    each batch. Returns {"inserted": n, "skipped": n}.
+    """
+    inserted = skipped = 0
+    batch = []
+    facet_delta = Counter()
+
+    def flush():
+        nonlocal inserted, batch, facet_delta
+        if not batch:
+            return
+        db.session.execute(insert(Book), batch)
+        inserted += len(batch)
+        if not replace:
+            add_facet_counts(facet_delta)
+            bump_catalog_version()
+            db.session.commit()
+        batch, facet_delta = [], Counter()
+        if progress:
+            progress(inserted, skipped)
+
+    try:
+        if replace:
+            db.session.execute(delete(Book))
+            clear_price_history()
+
+        for row in iter_book_rows(iter_json_array(fp)):
+            if row is None:
+                skipped += 1
+                continue
+            batch.append(row)
+            if not replace:
+                facet_delta[(row["publisher"] or "", row["level"] or "", row["status"] or "")] += 1
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+
+        # Starting price-history rows for the books just loaded
+        record_initial_prices()
+        if replace:
+            rebuild_facet_counts()
+            bump_catalog_version()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return {"inserted": inserted, "skipped": skipped}
+
+
+def upsert_books(rows, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Merge catalog rows into the books table without reloading it.
+    Rows are matched on (publisher, level, title); new ones are inserted,
+    ones whose isbn/price/status differ are updated, the rest are left
+    alone. Books missing from 'rows' are not deleted.
+    Returns {"inserted": n, "updated": n, "unchanged": n}.
+    """
+    incoming = {}
+    for row in rows:
+        if row.get("title"):
+            incoming[(row.get("publisher"), row.get("level"), row["title"])] = row
+    if not incoming:
+        return {"inserted": 0, "updated": 0, "unchanged": 0}
+
+    # Only the publishers being imported; served by ix_books_publisher_level_title
+    existing = {}
+    publishers = {key[0] for key in incoming}
+    match = Book.publisher.in_(publishers - {None})
+    if None in publishers:
+        match = or_(match, Book.publisher.is_(None))
+    stmt = select(Book.id, Book.publisher, Book.level, Book.title,
+                  Book.isbn, Book.price, Book.status).where(match)
+    for r in db.session.execute(stmt):
+        existing.setdefault((r.publisher, r.level, r.title), r)
+
+    to_insert, to_update, price_changes = [], [], []
+    facet_delta = Counter()
+    unchanged = 0
+    for key, row in incoming.items():
+        values = {"isbn": row.get("isbn"), "price": _clean_price(row.get("price")),
+                  "status": row.get("status")}
+        old = existing.get(key)
+        new_facets = (key[0] or "", key[1] or "", values["status"] or "")
+        if old is None:
+            to_insert.append({"publisher": key[0], "level": key[1], "title": key[2], **values})
+            facet_delta[new_facets] += 1
+        elif (old.isbn, old.price, old.status) != (values["isbn"], values["price"], values["status"]):
+            to_update.append({"id": old.id, **values})
+            if old.price != values["price"]:
+                price_changes.append((old.id, values["price"]))
+            facet_delta[(key[0] or "", key[1] or "", old.status or "")] -= 1
+            facet_delta[new_facets] += 1
+        else:
+            unchanged += 1
+
+    try:
+        for i in range(0, len(to_insert), batch_size):
+            db.session.execute(insert(Book), to_insert[i:i + batch_size])
+        for i in range(0, len(to_update), batch_size):
+            # executemany UPDATE ... WHERE id = :id
+            db.session.execute(update(Book), to_update[i:i + batch_size])
+        if to_insert or to_update:
+            now = datetime.utcnow()
+            record_prices(price_changes, now)
+            record_initial_prices(now)
+            add_facet_counts(facet_delta)
+            bump_catalog_version()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return {"inserted": len(to_insert), "updated": len(to_update), "unchanged": unchanged}
@@ -0,0 +1,165 @@
+# memindex.py
+"""
+In-memory catalog indexes that are rebuilt in the background.
+
+VersionedIndex is the shared lifecycle of fuzzy.TrigramIndex and
+autocomplete.PrefixIndex. Each keeps one data object built from the
+books table, tagged with the catalog version (see catalog.py) it
+reflects:
+
+  - create_app starts a build in a background thread (init_app), so the
+    first search does not pay for it
+  - the book routes call update() after committing; a change that is the
+    single step from the indexed version is patched in place
+  - any other version jump (imports, edits in another worker process)
+    starts a background rebuild. Lookups keep answering from the current
+    data meanwhile, and the new data is swapped in under the lock once
+    complete
+
+Only a lookup that finds no data at all (startup still building, or
+the first build failed) waits, and only for the running build. Answers
+from data behind the catalog must not be cached under the catalog's
+ETag; callers check is_current() before the lookup.
+
+Subclasses set 'extension' (the app.extensions key) and 'columns' (the
+Book columns to load) and implement _load(rows) -> data and
+_apply(data, *change).
+
+Config:
+    SEARCH_INDEX_WARMUP  False skips the startup build (tests, CLI-only
+                         apps); the first lookup then starts it
+"""
+import logging
+import threading
+from flask import current_app
+from sqlalchemy import inspect, select
+from models import db, CatalogState
+from catalog import get_catalog_version, catalog_version_column
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "SEARCH_INDEX_WARMUP": True,
+}
+
+BUILD_BATCH_SIZE = 5000
+
+
+def init_app(app, index_classes):
+    """Create the app's indexes and, if SEARCH_INDEX_WARMUP, start building them."""
+    for key, value in DEFAULTS.items():
+        app.config.setdefault(key, value)
+    for cls in index_classes:
+        index = cls.for_app(app)
+        if app.config["SEARCH_INDEX_WARMUP"]:
+            index.start_build(app)
+
+
+class VersionedIndex:
+    """Base class: versioned data, patched in place or rebuilt in the background."""
+
+    extension = None
+    columns = ()
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._data = None
+        self.version = None  # catalog version _data reflects
+        self._build_done = None  # Event of the running build, if any
+
+    @classmethod
+    def for_app(cls, app=None):
+        """The index for 'app' (default: the current app), created on first use."""
+        app = app or current_app._get_current_object()
+        index = app.extensions.get(cls.extension)
+        if index is None:
+            index = app.extensions.setdefault(cls.extension, cls())
+        return index
+
+    def start_build(self, app=None):
+        """
+        Rebuild in a background thread unless a build is already running.
+        Returns the threading.Event set when that build finishes.
+        """
+        app = app or current_app._get_current_object()
+        with self._lock:
+            if self._build_done is not None:
+                return self._build_done
+            done = self._build_done = threading.Event()
+        threading.Thread(target=self._build, args=(app, done), daemon=True,
+                         name=f"{self.extension}-build").start()
+        return done
+
+    def update(self, *change):
+        """
+        Reflect a committed change (arguments as for _apply). Patched in
+        place if it is the single change since the indexed version,
+        otherwise a background rebuild is started.
+        """
+        version, _ = get_catalog_version()
+        with self._lock:
+            if self._data is not None and self.version is not None \
+                    and version == self.version + 1:
+                self._apply(self._data, *change)
+                self.version = version
+                return
+        self.start_build()
+
+    def is_current(self):
+        """True if the data reflects the current catalog version."""
+        version, _ = get_catalog_version()
+        return self._data is not None and self.version == version
+
+    def _current(self):
+        """
+        Data to answer a lookup from (None if there is none yet). Starts a
+        rebuild when the catalog moved on; waits only if nothing is built.
+        """
+        version, _ = get_catalog_version()
+        if self.version != version:
+            done = self.start_build()
+            if self._data is None:
+                done.wait()
+        return self._data
+
+    def _build(self, app, done):
+        try:
+            with app.app_context():
+                try:
+                    # Tables not there yet (create_app before `flask db upgrade`)
+                    if not inspect(db.engine).has_table(CatalogState.__tablename__):
+                        return
+                    # The version rides along on every row, so it and the
+                    # rows come from one statement's snapshot
+                    stmt = (select(catalog_version_column(), *self.columns)
+                            .execution_options(yield_per=BUILD_BATCH_SIZE))
+                    seen = []
+
+                    def rows():
+                        for version, *row in db.session.execute(stmt):
+                            if not seen:
+                                seen.append(version)
+                            yield row
+
+                    data = self._load(rows())
+                    version = (seen[0] if seen else get_catalog_version()[0]) or 0
+                finally:
+                    db.session.remove()
+            with self._lock:
+                # An update() may have patched the old data past this snapshot
+                if self.version is None or version >= self.version:
+                    data, self._data, self.version = self._data, data, version
+            # The replaced data is freed here, outside the lock
+            del data
+        except Exception:
+            logger.exception("Building %s failed", self.extension)
+        finally:
+            with self._lock:
+                self._build_done = None
+            done.set()
+
+    def _load(self, rows):
+        raise NotImplementedError
+
+    def _apply(self, data, *change):
+        raise NotImplementedError
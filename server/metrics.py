@@ -0,0 +1,172 @@
+# metrics.py
+"""
+Request metrics in the Prometheus text format, served at GET /metrics.
+
+For every request we record, labelled by Flask endpoint (e.g.
+"books.filter_books"), method and status:
+
+  http_request_duration_seconds      wall time until the last byte of the
+                                     body was produced (streamed bodies too)
+  http_request_sql_statements        SQL statements the request executed
+  http_request_sql_duration_seconds  time spent inside those statements
+
+SQL is counted with engine before/after_cursor_execute events, so
+statements run by anything else (the audit writer thread, CLI commands)
+are not attributed to a request.
+
+Config:
+    METRICS_ENABLED  False installs no hooks and no /metrics route at all
+    METRICS_TOKEN    if set, /metrics requires "Authorization: Bearer <token>"
+
+Each process keeps its own numbers; with several workers, scrape each one
+(or label them by instance).
+"""
+import bisect
+import threading
+import time
+from flask import Response, current_app, g, has_app_context, request
+from sqlalchemy import event
+from models import db
+
+DEFAULTS = {
+    "METRICS_ENABLED": True,
+    "METRICS_TOKEN": None,
+}
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+SQL_TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+_SQL_START = "metrics_sql_start"
+
+
+class Histogram:
+    """A labelled Prometheus histogram; observe() is thread-safe."""
+
+    def __init__(self, name, help_text, labelnames, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        # First bucket whose upper bound ('le') is >= value; past the end is +Inf
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += value
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = sorted((k, list(v)) for k, v in self._series.items())
+        for labels, series in snapshot:
+            base = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series[:-1]):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{base},le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{base}}} {series[-1]}")
+            lines.append(f"{self.name}_count{{{base}}} {cumulative}")
+        return lines
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+LABELS = ("endpoint", "method", "status")
+request_duration = Histogram(
+    "http_request_duration_seconds", "Request latency.", LABELS, LATENCY_BUCKETS)
+request_sql_statements = Histogram(
+    "http_request_sql_statements", "SQL statements executed per request.", LABELS,
+    SQL_COUNT_BUCKETS)
+request_sql_duration = Histogram(
+    "http_request_sql_duration_seconds", "Time spent in SQL per request.", LABELS,
+    SQL_TIME_BUCKETS)
+HISTOGRAMS = (request_duration, request_sql_statements, request_sql_duration)
+
+
+def init_app(app):
+    """Install the request/SQL hooks and the /metrics route (if enabled)."""
+    for key, value in DEFAULTS.items():
+        app.config.setdefault(key, value)
+    if not app.config["METRICS_ENABLED"]:
+        return
+
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.add_url_rule("/metrics", "metrics", metrics_view, methods=["GET"])
+
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _start_request():
+    # [statement count, seconds in SQL]
+    g._metrics_sql = [0, 0.0]
+    g._metrics_start = time.perf_counter()
+
+
+def _finish_request(response):
+    start = g.pop("_metrics_start", None)
+    sql = g.get("_metrics_sql")
+    if start is None or request.endpoint == "metrics":
+        return response
+    labels = (request.endpoint or "unmatched", request.method, str(response.status_code))
+
+    def record():
+        request_duration.observe(labels, time.perf_counter() - start)
+        request_sql_statements.observe(labels, sql[0])
+        request_sql_duration.observe(labels, sql[1])
+
+    if response.is_streamed:
+        # The body (and its queries) is produced after this hook returns
+        response.call_on_close(record)
+    else:
+        record()
+    return response
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info[_SQL_START] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = conn.info.pop(_SQL_START, None)
+    if start is None or not has_app_context():
+        return
+    sql = g.get("_metrics_sql")
+    if sql is not None:
+        sql[0] += 1
+        sql[1] += time.perf_counter() - start
+
+
+def render_metrics():
+    """All histograms in the Prometheus text exposition format."""
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view():
+    """
+    Prometheus scrape endpoint.
+    Example: GET /metrics
+    """
+    token = current_app.config["METRICS_TOKEN"]
+    if token and request.headers.get("Authorization") != f"Bearer {token}":
+        return Response("Unauthorized\n", status=401, mimetype="text/plain")
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
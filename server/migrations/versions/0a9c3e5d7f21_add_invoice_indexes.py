@@ -0,0 +1,26 @@
+"""Add invoice listing indexes
+
+Revision ID: 0a9c3e5d7f21
+Revises: f17b2d94c0e6
+Create Date: 2025-01-24 15:02:47.391058
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0a9c3e5d7f21'
+down_revision = 'f17b2d94c0e6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_invoices_user_id_created_at', 'invoices', ['user_id', 'created_at'], unique=False)
+    op.create_index('ix_invoice_items_invoice_id', 'invoice_items', ['invoice_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_invoice_items_invoice_id', table_name='invoice_items')
+    op.drop_index('ix_invoices_user_id_created_at', table_name='invoices')
@@ -0,0 +1,67 @@
+"""Add books_fts full-text index
+
+Revision ID: 3b7e1f2c9d40
+Revises: ac42821c9ee2
+Create Date: 2025-01-06 10:12:41.508113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b7e1f2c9d40'
+down_revision = 'ac42821c9ee2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # FTS5 is SQLite-only; other backends keep the ilike fallback in search.py
+    if op.get_bind().dialect.name != "sqlite":
+        return
+
+    # External-content table: the index stores tokens only, rows live in books
+    op.execute("""
+        CREATE VIRTUAL TABLE books_fts USING fts5(
+            title, publisher, level,
+            content='books', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        )
+    """)
+
+    # Keep the index in sync with every write to books
+    op.execute("""
+        CREATE TRIGGER books_fts_ai AFTER INSERT ON books BEGIN
+            INSERT INTO books_fts(rowid, title, publisher, level)
+            VALUES (new.id, new.title, new.publisher, new.level);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER books_fts_ad AFTER DELETE ON books BEGIN
+            INSERT INTO books_fts(books_fts, rowid, title, publisher, level)
+            VALUES ('delete', old.id, old.title, old.publisher, old.level);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER books_fts_au AFTER UPDATE ON books BEGIN
+            INSERT INTO books_fts(books_fts, rowid, title, publisher, level)
+            VALUES ('delete', old.id, old.title, old.publisher, old.level);
+            INSERT INTO books_fts(rowid, title, publisher, level)
+            VALUES (new.id, new.title, new.publisher, new.level);
+        END
+    """)
+
+    # Index the rows that already exist
+    op.execute("INSERT INTO books_fts(books_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != "sqlite":
+        return
+
+    op.execute("DROP TRIGGER IF EXISTS books_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS books_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS books_fts_ai")
+    op.execute("DROP TABLE IF EXISTS books_fts")
@@ -0,0 +1,35 @@
+"""Add sales_rollups aggregate table
+
+Revision ID: 5e6d8b1a4c93
+Revises: 0a9c3e5d7f21
+Create Date: 2025-01-28 10:41:15.206734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e6d8b1a4c93'
+down_revision = '0a9c3e5d7f21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('sales_rollups',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('dimension', sa.String(length=20), nullable=False),
+    sa.Column('key', sa.String(length=255), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.Column('lines', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'dimension', 'key')
+    )
+    op.create_index('ix_sales_rollups_dimension_day', 'sales_rollups', ['dimension', 'day'], unique=False)
+    # Existing invoice history is loaded with `flask custom rebuild-rollups`
+
+
+def downgrade():
+    op.drop_index('ix_sales_rollups_dimension_day', table_name='sales_rollups')
+    op.drop_table('sales_rollups')
@@ -0,0 +1,78 @@
+"""Add book_prices history table
+
+Revision ID: 7b3f0e9a2d58
+Revises: 5e6d8b1a4c93
+Create Date: 2025-02-03 09:12:40.518803
+
+"""
+from datetime import datetime
+import json
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7b3f0e9a2d58'
+down_revision = '5e6d8b1a4c93'
+branch_labels = None
+depends_on = None
+
+# valid_from for prices whose start is unknown (books loaded by an import,
+# or already updated before their CREATE was audited)
+BEGINNING = datetime(1970, 1, 1)
+
+
+def upgrade():
+    book_prices = op.create_table('book_prices',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('valid_from', sa.DateTime(), nullable=False),
+    sa.Column('price', sa.Float(), nullable=True),
+    sa.ForeignKeyConstraint(['book_id'], ['books.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_book_prices_book_id_valid_from', 'book_prices', ['book_id', 'valid_from'], unique=False)
+
+    # Backfill from the audit trail, once, so as_of lookups work for the past too
+    conn = op.get_bind()
+    current = dict(conn.execute(sa.text("SELECT id, price FROM books")).all())
+    audits = conn.execute(sa.text("""
+        SELECT book_id, action, old_data, new_data, timestamp FROM book_audits
+        WHERE action IN ('CREATE', 'UPDATE') AND book_id IS NOT NULL
+        ORDER BY book_id, timestamp, id
+    """))
+
+    rows = []
+    last_price = {}
+    for book_id, action, old_data, new_data, timestamp in audits:
+        if book_id not in current:
+            continue
+        if book_id not in last_price and action == 'UPDATE' and old_data:
+            price = json.loads(old_data).get('price')
+            rows.append({'book_id': book_id, 'valid_from': BEGINNING, 'price': price})
+            last_price[book_id] = price
+        price = json.loads(new_data or '{}').get('price')
+        if book_id not in last_price or price != last_price[book_id]:
+            rows.append({'book_id': book_id, 'valid_from': _as_datetime(timestamp), 'price': price})
+            last_price[book_id] = price
+
+    now = datetime.utcnow()
+    for book_id, price in current.items():
+        if book_id not in last_price:
+            rows.append({'book_id': book_id, 'valid_from': BEGINNING, 'price': price})
+        elif last_price[book_id] != price:
+            # changed by an import, which does not audit per book
+            rows.append({'book_id': book_id, 'valid_from': now, 'price': price})
+
+    if rows:
+        op.bulk_insert(book_prices, rows)
+
+
+def _as_datetime(value):
+    # SQLite hands DateTime columns back as strings from raw SQL
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+def downgrade():
+    op.drop_index('ix_book_prices_book_id_valid_from', table_name='book_prices')
+    op.drop_table('book_prices')
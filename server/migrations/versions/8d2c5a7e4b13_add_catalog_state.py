@@ -0,0 +1,33 @@
+"""Add catalog_state version row
+
+Revision ID: 8d2c5a7e4b13
+Revises: 3b7e1f2c9d40
+Create Date: 2025-01-08 14:37:09.215546
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d2c5a7e4b13'
+down_revision = '3b7e1f2c9d40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    catalog_state = op.create_table('catalog_state',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.bulk_insert(catalog_state, [
+        {"id": 1, "version": 1, "updated_at": datetime.utcnow()},
+    ])
+
+
+def downgrade():
+    op.drop_table('catalog_state')
@@ -0,0 +1,24 @@
+"""Add books level index
+
+Revision ID: 9c1d4e7a3b62
+Revises: 7b3f0e9a2d58
+Create Date: 2025-02-10 10:05:13.402117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c1d4e7a3b62'
+down_revision = '7b3f0e9a2d58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_books_level', 'books', ['level'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_books_level', table_name='books')
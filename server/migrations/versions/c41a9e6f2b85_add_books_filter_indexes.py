@@ -0,0 +1,32 @@
+"""Add books filter/sort indexes
+
+Revision ID: c41a9e6f2b85
+Revises: 8d2c5a7e4b13
+Create Date: 2025-01-10 09:48:22.671930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41a9e6f2b85'
+down_revision = '8d2c5a7e4b13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_books_publisher_level_title', 'books', ['publisher', 'level', 'title'], unique=False)
+    op.create_index('ix_books_publisher_level_price', 'books', ['publisher', 'level', 'price'], unique=False)
+    op.create_index('ix_books_title', 'books', ['title'], unique=False)
+    op.create_index('ix_books_price', 'books', ['price'], unique=False)
+    op.create_index('ix_books_status', 'books', ['status'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_books_status', table_name='books')
+    op.drop_index('ix_books_price', table_name='books')
+    op.drop_index('ix_books_title', table_name='books')
+    op.drop_index('ix_books_publisher_level_price', table_name='books')
+    op.drop_index('ix_books_publisher_level_title', table_name='books')
@@ -0,0 +1,37 @@
+"""Add book_facet_counts aggregate table
+
+Revision ID: e5f80b3d6a27
+Revises: c41a9e6f2b85
+Create Date: 2025-01-13 16:05:54.130482
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5f80b3d6a27'
+down_revision = 'c41a9e6f2b85'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('book_facet_counts',
+    sa.Column('publisher', sa.String(length=255), nullable=False),
+    sa.Column('level', sa.String(length=50), nullable=False),
+    sa.Column('status', sa.String(length=50), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('publisher', 'level', 'status')
+    )
+    # Seed the aggregates from the existing catalog
+    op.execute("""
+        INSERT INTO book_facet_counts (publisher, level, status, count)
+        SELECT COALESCE(publisher, ''), COALESCE(level, ''), COALESCE(status, ''), COUNT(*)
+        FROM books
+        GROUP BY COALESCE(publisher, ''), COALESCE(level, ''), COALESCE(status, '')
+    """)
+
+
+def downgrade():
+    op.drop_table('book_facet_counts')
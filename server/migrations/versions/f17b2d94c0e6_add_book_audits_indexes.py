@@ -0,0 +1,30 @@
+"""Add book_audits query indexes
+
+Revision ID: f17b2d94c0e6
+Revises: e5f80b3d6a27
+Create Date: 2025-01-21 11:26:03.884217
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f17b2d94c0e6'
+down_revision = 'e5f80b3d6a27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_book_audits_book_id_timestamp', 'book_audits', ['book_id', 'timestamp'], unique=False)
+    op.create_index('ix_book_audits_user_id_timestamp', 'book_audits', ['user_id', 'timestamp'], unique=False)
+    op.create_index('ix_book_audits_action_timestamp', 'book_audits', ['action', 'timestamp'], unique=False)
+    op.create_index('ix_book_audits_timestamp', 'book_audits', ['timestamp'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_book_audits_timestamp', table_name='book_audits')
+    op.drop_index('ix_book_audits_action_timestamp', table_name='book_audits')
+    op.drop_index('ix_book_audits_user_id_timestamp', table_name='book_audits')
+    op.drop_index('ix_book_audits_book_id_timestamp', table_name='book_audits')
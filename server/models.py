@@ -26,9 +26,49 @@ class Book(db.Model):
     price = db.Column(db.Float, nullable=True)
     status = db.Column(db.String(50), nullable=True)
 
+    __table_args__ = (
+        # Exact publisher/level filters, sorted by title or price
+        db.Index("ix_books_publisher_level_title", "publisher", "level", "title"),
+        db.Index("ix_books_publisher_level_price", "publisher", "level", "price"),
+        # Unfiltered title/price sorts and keyset pages
+        db.Index("ix_books_title", "title"),
+        db.Index("ix_books_price", "price"),
+        db.Index("ix_books_status", "status"),
+        # level_in= without a publisher
+        db.Index("ix_books_level", "level"),
+    )
+
     def __repr__(self):
         return f"<Book {self.title[:30]}... (id={self.id})>"
 
+class CatalogState(db.Model):
+    """
+    Single-row table (id=1) whose version is bumped by every change to
+    the books table. Read endpoints derive their ETags from it.
+    """
+    __tablename__ = "catalog_state"
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<CatalogState version={self.version}>"
+
+class BookFacetCount(db.Model):
+    """
+    Number of books per (publisher, level, status) combination, kept up to
+    date by the book routes so facet counts never need to scan 'books'.
+    NULL values are stored as '' so the combination stays unique.
+    """
+    __tablename__ = "book_facet_counts"
+    publisher = db.Column(db.String(255), primary_key=True, default="")
+    level = db.Column(db.String(50), primary_key=True, default="")
+    status = db.Column(db.String(50), primary_key=True, default="")
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<BookFacetCount {self.publisher}/{self.level}/{self.status}={self.count}>"
+
 class BookAudit(db.Model):
     __tablename__ = "book_audits"
     id = db.Column(db.Integer, primary_key=True)
@@ -42,9 +82,36 @@ class BookAudit(db.Model):
     user = db.relationship("User", backref="changes_made")
     book = db.relationship("Book", backref="change_logs")
 
+    __table_args__ = (
+        # Audit trail queries: newest first, per book / per user / overall
+        db.Index("ix_book_audits_book_id_timestamp", "book_id", "timestamp"),
+        db.Index("ix_book_audits_user_id_timestamp", "user_id", "timestamp"),
+        db.Index("ix_book_audits_action_timestamp", "action", "timestamp"),
+        db.Index("ix_book_audits_timestamp", "timestamp"),
+    )
+
     def __repr__(self):
         return f"<BookAudit user_id={self.user_id}, action={self.action}, time={self.timestamp}>"
 
+class BookPrice(db.Model):
+    """
+    Price history: one row per price a book has had, effective from
+    valid_from until the book's next row. See prices.py.
+    """
+    __tablename__ = "book_prices"
+    id = db.Column(db.Integer, primary_key=True)
+    book_id = db.Column(db.Integer, db.ForeignKey("books.id"), nullable=False)
+    valid_from = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    price = db.Column(db.Float, nullable=True)
+
+    __table_args__ = (
+        # Price of a book at time T: one seek to the last row <= T
+        db.Index("ix_book_prices_book_id_valid_from", "book_id", "valid_from"),
+    )
+
+    def __repr__(self):
+        return f"<BookPrice book_id={self.book_id} price={self.price} from={self.valid_from}>"
+
 class Invoice(db.Model):
     __tablename__ = "invoices"
 
@@ -59,6 +126,11 @@ class Invoice(db.Model):
     # if you want line-item details, define a relationship to InvoiceItem
     items = db.relationship("InvoiceItem", backref="invoice", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # A user's invoices, newest first
+        db.Index("ix_invoices_user_id_created_at", "user_id", "created_at"),
+    )
+
 class InvoiceItem(db.Model):
     __tablename__ = "invoice_items"
 
@@ -69,3 +141,29 @@ class InvoiceItem(db.Model):
     quantity = db.Column(db.Integer, nullable=False, default=1)  # <--- for multiple copies
 
     book = db.relationship("Book", backref="invoice_items")
+
+    __table_args__ = (
+        db.Index("ix_invoice_items_invoice_id", "invoice_id"),
+    )
+
+class SalesRollup(db.Model):
+    """
+    Pre-aggregated sales per day and dimension, maintained by create_invoice.
+    dimension is "book" (key = book id), "publisher", "level" or "total"
+    (key = ""). Reports read these rows instead of scanning invoice_items.
+    """
+    __tablename__ = "sales_rollups"
+    day = db.Column(db.Date, primary_key=True)
+    dimension = db.Column(db.String(20), primary_key=True)
+    key = db.Column(db.String(255), primary_key=True)
+    quantity = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+    lines = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        # Reports ask for one dimension over a date range
+        db.Index("ix_sales_rollups_dimension_day", "dimension", "day"),
+    )
+
+    def __repr__(self):
+        return f"<SalesRollup {self.day} {self.dimension}={self.key} revenue={self.revenue}>"
@@ -0,0 +1,59 @@
+# pagination.py
+"""
+Opaque cursors for keyset ("after=") pagination.
+
+A cursor is the JSON list of values identifying the last row of a page
+(e.g. ["title", "asc", "KLB skillgrow", 42]), base64url-encoded so clients
+treat it as a token rather than something to build by hand.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+
+# Row ids are bound as SQLite INTEGER / BIGINT: signed 64-bit
+MIN_ROW_ID = -2 ** 63
+MAX_ROW_ID = 2 ** 63 - 1
+
+
+def encode_cursor(values):
+    """Pack a list of JSON-serializable values into a URL-safe token."""
+    raw = json.dumps(list(values), separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token, length):
+    """
+    Unpack a token made by encode_cursor into a list of 'length' values.
+    Raises ValueError if it is malformed.
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+    except (TypeError, ValueError, binascii.Error):
+        raise ValueError("malformed cursor")
+    if not isinstance(values, list) or len(values) != length:
+        raise ValueError("malformed cursor")
+    return values
+
+
+def is_row_id(value):
+    """True if 'value' can be bound as a row id: an int (not a bool) in 64-bit range."""
+    return (isinstance(value, int) and not isinstance(value, bool)
+            and MIN_ROW_ID <= value <= MAX_ROW_ID)
+
+
+def encode_time_cursor(moment, row_id):
+    """Cursor for newest-first listings keyed on (timestamp, id)."""
+    return encode_cursor([moment.isoformat(), row_id])
+
+
+def decode_time_cursor(token):
+    """
+    Unpack a token made by encode_time_cursor into (datetime, id).
+    Raises ValueError if it is malformed.
+    """
+    moment, row_id = decode_cursor(token, 2)
+    if not isinstance(moment, str) or not is_row_id(row_id):
+        raise ValueError("malformed cursor")
+    return datetime.fromisoformat(moment), row_id
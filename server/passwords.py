@@ -0,0 +1,135 @@
+# passwords.py
+"""
+Password hashing off the request thread.
+
+generate_password_hash/check_password_hash are deliberately slow, so
+they run in a small dedicated process pool instead of inside the request
+worker. The pool is bounded: when PASSWORD_HASH_MAX_PENDING jobs are
+already queued, callers get HashingBusy at once (the routes turn it into
+a 503) rather than piling up behind a login burst. A job that takes
+longer than PASSWORD_HASH_TIMEOUT also ends in HashingBusy; its slot is
+only freed when the job itself finishes (or is cancelled), so the bound
+holds even for abandoned jobs.
+
+Workers are started with forkserver (spawn where that is unavailable),
+never forked from the multithreaded server process. As with any
+non-fork start method, a script that runs the app directly must keep its
+entry point under `if __name__ == "__main__":` (app.py, seed.py and
+bench.py do).
+
+Config (set on the app, defaults below):
+    PASSWORD_HASH_METHOD       werkzeug method string, e.g. "scrypt:32768:8:1"
+                               or "pbkdf2:sha256:600000"
+    PASSWORD_HASH_WORKERS      pool size; 0 hashes inline (tests, tiny boxes)
+    PASSWORD_HASH_MAX_PENDING  queued jobs before HashingBusy
+    PASSWORD_HASH_TIMEOUT      seconds to wait for a result
+
+Hashes made with an older METHOD still verify; login re-hashes them with
+the current one (see needs_rehash).
+"""
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+DEFAULTS = {
+    "PASSWORD_HASH_METHOD": "scrypt:32768:8:1",
+    "PASSWORD_HASH_WORKERS": min(4, os.cpu_count() or 1),
+    "PASSWORD_HASH_MAX_PENDING": 64,
+    "PASSWORD_HASH_TIMEOUT": 10.0,
+}
+
+
+class HashingBusy(Exception):
+    """The hashing pool is saturated; ask the client to retry."""
+
+
+class _HashPool:
+    def __init__(self, workers, max_pending, timeout):
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        if workers > 0:
+            self._executor = ProcessPoolExecutor(max_workers=workers, mp_context=_mp_context())
+
+    def run(self, fn, *args):
+        if self._executor is None:
+            return fn(*args)
+        # Shed load at once instead of parking the request thread
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot belongs to the job, not to this caller: freed when it is done
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            future.cancel()  # drops it if still queued; a running job finishes
+            raise HashingBusy()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _mp_context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+_pool = None
+_pool_lock = threading.Lock()
+# configured method -> the exact prefix werkzeug writes for it
+_method_prefixes = {}
+
+
+def init_app(app):
+    """Register the hashing config defaults on the app."""
+    for key, value in DEFAULTS.items():
+        app.config.setdefault(key, value)
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                cfg = current_app.config
+                _pool = _HashPool(
+                    cfg["PASSWORD_HASH_WORKERS"],
+                    cfg["PASSWORD_HASH_MAX_PENDING"],
+                    cfg["PASSWORD_HASH_TIMEOUT"],
+                )
+                atexit.register(_pool.shutdown)
+    return _pool
+
+
+def hash_password(password):
+    """Hash a password with the configured method, in the pool."""
+    method = current_app.config["PASSWORD_HASH_METHOD"]
+    return _get_pool().run(generate_password_hash, password, method)
+
+
+def verify_password(password_hash, password):
+    """check_password_hash, in the pool."""
+    return _get_pool().run(check_password_hash, password_hash, password)
+
+
+def needs_rehash(password_hash):
+    """True if a stored hash was made with different parameters than now configured."""
+    method = current_app.config["PASSWORD_HASH_METHOD"]
+    prefix = _method_prefixes.get(method)
+    if prefix is None:
+        # Let werkzeug fill in any defaulted parameters, e.g.
+        # "pbkdf2:sha256" -> "pbkdf2:sha256:1000000"
+        prefix = _get_pool().run(generate_password_hash, "", method).split("$", 1)[0]
+        _method_prefixes[method] = prefix
+    return password_hash.split("$", 1)[0] != prefix
@@ -0,0 +1,90 @@
+# prices.py
+"""
+Price history for point-in-time lookups.
+
+book_prices holds one row per price a book has had, stamped with the
+moment it took effect (valid_from). The price of book B at time T is the
+row with the latest valid_from <= T, i.e. a single seek on
+ix_book_prices_book_id_valid_from, however long the history is.
+
+Writers call record_prices() when prices change (before committing),
+and record_initial_prices() after bulk loads.
+"""
+from datetime import datetime, timezone
+from sqlalchemy import delete, insert, select, exists, literal
+from models import db, Book, BookPrice
+
+
+def parse_as_of(raw):
+    """
+    Parse an ?as_of= value (ISO 8601 date or timestamp) into naive UTC,
+    the form valid_from is stored in. A value with an offset is converted
+    ("2025-01-01T03:00+03:00" -> 2025-01-01 00:00); one without is taken
+    as UTC. Returns None for an empty value; raises ValueError if malformed.
+    """
+    if not raw:
+        return None
+    try:
+        moment = datetime.fromisoformat(raw)
+    except (TypeError, ValueError):
+        raise ValueError("as_of must be an ISO 8601 date or timestamp")
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def record_prices(changes, when=None):
+    """
+    Record new prices, effective from 'when' (default: now).
+    'changes' is an iterable of (book_id, price). Caller commits.
+    """
+    when = when or datetime.utcnow()
+    rows = [{"book_id": book_id, "price": price, "valid_from": when}
+            for book_id, price in changes]
+    if rows:
+        db.session.execute(insert(BookPrice), rows)
+
+
+def record_initial_prices(when=None):
+    """
+    Give every book without any history a starting row at its current
+    price (used after imports, which insert books in bulk). Caller commits.
+    """
+    has_history = exists().where(BookPrice.book_id == Book.id)
+    source = select(Book.id, literal(when or datetime.utcnow()), Book.price) \
+        .where(~has_history)
+    db.session.execute(
+        insert(BookPrice).from_select(["book_id", "valid_from", "price"], source)
+    )
+
+
+def clear_price_history(book_id=None):
+    """Drop the history of one book, or of every book when book_id is None."""
+    stmt = delete(BookPrice)
+    if book_id is not None:
+        stmt = stmt.where(BookPrice.book_id == book_id)
+    db.session.execute(stmt)
+
+
+def price_as_of(as_of):
+    """
+    Correlated scalar subquery giving each Book's price at 'as_of'
+    (NULL if the book had no recorded price yet). Usable anywhere
+    Book.price is: select lists, filters, ORDER BY.
+    """
+    return (
+        select(BookPrice.price)
+        .where(BookPrice.book_id == Book.id, BookPrice.valid_from <= as_of)
+        .order_by(BookPrice.valid_from.desc())
+        .limit(1)
+        .correlate(Book)
+        .scalar_subquery()
+    )
+
+
+def prices_as_of(book_ids, as_of):
+    """{book_id: price at 'as_of'} for the given books, in one query."""
+    if not book_ids:
+        return {}
+    stmt = select(Book.id, price_as_of(as_of)).where(Book.id.in_(set(book_ids)))
+    return dict(db.session.execute(stmt).all())
@@ -0,0 +1,121 @@
+# rollups.py
+"""
+Sales rollups: revenue/quantity per day for each book, publisher, level
+and overall, kept in sales_rollups.
+
+create_invoice calls record_sales() in the same transaction as the
+invoice, so a report only ever reads (days x keys) rollup rows no matter
+how many invoices exist. rebuild_sales_rollups() recomputes everything
+from invoice_items (`flask custom rebuild-rollups`).
+"""
+from collections import defaultdict
+from sqlalchemy import delete, insert, select, func, literal, cast, String
+from models import db, Book, Invoice, InvoiceItem, SalesRollup
+from database import insert_or_increment_many
+
+DIMENSIONS = ("book", "publisher", "level", "total")
+
+
+def _keys_for(book):
+    """(dimension, key) pairs one sold book contributes to."""
+    return (
+        ("book", str(book.id)),
+        ("publisher", book.publisher or ""),
+        ("level", book.level or ""),
+        ("total", ""),
+    )
+
+
+def record_sales(lines):
+    """
+    Add sold lines to the rollups. 'lines' is an iterable of
+    (day, book, quantity, unit_price). Call before committing the invoice.
+    """
+    deltas = defaultdict(lambda: [0, 0.0, 0])
+    for day, book, quantity, unit_price in lines:
+        for dimension, key in _keys_for(book):
+            d = deltas[(day, dimension, key)]
+            d[0] += quantity
+            d[1] += quantity * unit_price
+            d[2] += 1
+
+    # Upserts, so concurrent first sales of a day cannot collide; all rows
+    # in one statement rather than a round-trip per (day, dimension, key)
+    insert_or_increment_many(SalesRollup, ("day", "dimension", "key"), [
+        {"day": day, "dimension": dimension, "key": key,
+         "quantity": quantity, "revenue": revenue, "lines": n_lines}
+        for (day, dimension, key), (quantity, revenue, n_lines) in deltas.items()
+    ])
+
+
+def rebuild_sales_rollups():
+    """Recompute every rollup row from invoices/invoice_items. Caller commits."""
+    db.session.execute(delete(SalesRollup))
+    day = func.date(Invoice.created_at)
+    key_columns = {
+        "book": cast(InvoiceItem.book_id, String),
+        "publisher": func.coalesce(Book.publisher, ""),
+        "level": func.coalesce(Book.level, ""),
+        "total": literal(""),
+    }
+    for dimension, key in key_columns.items():
+        source = (
+            select(
+                day,
+                literal(dimension),
+                key,
+                func.sum(InvoiceItem.quantity),
+                func.sum(InvoiceItem.quantity * InvoiceItem.book_price),
+                func.count(InvoiceItem.id),
+            )
+            .select_from(InvoiceItem)
+            .join(Invoice, Invoice.id == InvoiceItem.invoice_id)
+            .outerjoin(Book, Book.id == InvoiceItem.book_id)
+            .group_by(day, key)
+        )
+        db.session.execute(
+            insert(SalesRollup).from_select(
+                ["day", "dimension", "key", "quantity", "revenue", "lines"], source
+            )
+        )
+
+
+def sales_report(dimension, since=None, until=None, key=None, by_day=False):
+    """
+    Aggregate rollups for one dimension over [since, until).
+    Returns [{key, quantity, revenue, lines}] (plus 'day' when by_day),
+    highest revenue first, or by day then revenue when by_day.
+    """
+    cols = [SalesRollup.key]
+    if by_day:
+        cols.insert(0, SalesRollup.day)
+    stmt = select(
+        *cols,
+        func.sum(SalesRollup.quantity).label("quantity"),
+        func.sum(SalesRollup.revenue).label("revenue"),
+        func.sum(SalesRollup.lines).label("lines"),
+    ).where(SalesRollup.dimension == dimension)
+    if since is not None:
+        stmt = stmt.where(SalesRollup.day >= since)
+    if until is not None:
+        stmt = stmt.where(SalesRollup.day < until)
+    if key is not None:
+        stmt = stmt.where(SalesRollup.key == key)
+    stmt = stmt.group_by(*cols)
+    if by_day:
+        stmt = stmt.order_by(SalesRollup.day, func.sum(SalesRollup.revenue).desc())
+    else:
+        stmt = stmt.order_by(func.sum(SalesRollup.revenue).desc())
+
+    report = []
+    for row in db.session.execute(stmt):
+        entry = {
+            "key": row.key,
+            "quantity": row.quantity,
+            "revenue": round(row.revenue, 2),
+            "lines": row.lines,
+        }
+        if by_day:
+            entry["day"] = row.day.isoformat()
+        report.append(entry)
+    return report
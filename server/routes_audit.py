@@ -0,0 +1,140 @@
+# routes_audit.py
+
+from datetime import datetime, timezone
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from flask_jwt_extended import jwt_required
+from sqlalchemy import select, or_, and_
+from models import db, BookAudit
+from schemas import BookAuditSchema
+from routes_users import current_user, is_admin
+from pagination import encode_time_cursor, decode_time_cursor, is_row_id
+import json
+
+audit_bp = Blueprint("audit", __name__)
+audit_schema = BookAuditSchema()
+
+MAX_PAGE_SIZE = 200
+EXPORT_BATCH_SIZE = 1000
+
+
+class AuditQueryError(Exception):
+    """Bad query args (becomes a 400)."""
+
+
+def _audit_filters():
+    """
+    Build WHERE clauses from ?book_id=&user_id=&action=&since=&until=
+    (since/until are ISO 8601 timestamps, since inclusive, until exclusive;
+    one with an offset is converted to UTC, the form timestamps are stored in).
+    """
+    clauses = []
+    for arg, col in (("book_id", BookAudit.book_id), ("user_id", BookAudit.user_id)):
+        if arg in request.args:
+            value = request.args.get(arg, type=int)
+            if value is None or not is_row_id(value):
+                raise AuditQueryError(f"{arg} must be an integer id")
+            clauses.append(col == value)
+
+    action = request.args.get("action", "").strip().upper()
+    if action:
+        clauses.append(BookAudit.action == action)
+
+    for arg in ("since", "until"):
+        raw = request.args.get(arg)
+        if not raw:
+            continue
+        try:
+            ts = datetime.fromisoformat(raw)
+        except ValueError:
+            raise AuditQueryError(f"{arg} must be an ISO 8601 timestamp")
+        if ts.tzinfo is not None:
+            ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+        clauses.append(BookAudit.timestamp >= ts if arg == "since" else BookAudit.timestamp < ts)
+    return clauses
+
+
+def _newest_first(stmt):
+    # (timestamp, id) desc; served by the ix_book_audits_*_timestamp indexes
+    return stmt.order_by(BookAudit.timestamp.desc(), BookAudit.id.desc())
+
+
+def _admin_required():
+    user = current_user()
+    if not user or not is_admin(user):
+        return jsonify({"error": "Admin permission required"}), 403
+    return None
+
+
+@audit_bp.route("/audits", methods=["GET"])
+@jwt_required()
+def list_audits():
+    """
+    Admin endpoint: page through the audit trail, newest first.
+    Example: GET /api/audits?book_id=12&action=UPDATE&since=2025-01-01&limit=50
+    Pass the returned 'next_cursor' as ?after=<cursor> for the next page.
+    """
+    denied = _admin_required()
+    if denied:
+        return denied
+
+    try:
+        limit = min(max(int(request.args.get("limit", 50)), 1), MAX_PAGE_SIZE)
+        clauses = _audit_filters()
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    except AuditQueryError as e:
+        return jsonify({"error": str(e)}), 400
+
+    after = request.args.get("after")
+    if after:
+        try:
+            ts, last_id = decode_time_cursor(after)
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
+        clauses.append(or_(
+            BookAudit.timestamp < ts,
+            and_(BookAudit.timestamp == ts, BookAudit.id < last_id),
+        ))
+
+    stmt = _newest_first(select(BookAudit).where(*clauses)).limit(limit + 1)
+    rows = db.session.execute(stmt).scalars().all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_time_cursor(last.timestamp, last.id)
+
+    return jsonify({
+        "limit": limit,
+        "next_cursor": next_cursor,
+        "data": audit_schema.dump(rows, many=True),
+    }), 200
+
+
+@audit_bp.route("/audits/export", methods=["GET"])
+@jwt_required()
+def export_audits():
+    """
+    Admin endpoint: stream every matching audit row as NDJSON (newest first).
+    Takes the same filters as /api/audits.
+    Example: GET /api/audits/export?user_id=3&since=2025-01-01
+    """
+    denied = _admin_required()
+    if denied:
+        return denied
+
+    try:
+        clauses = _audit_filters()
+    except AuditQueryError as e:
+        return jsonify({"error": str(e)}), 400
+
+    def generate():
+        cols = select(*BookAudit.__table__.columns).where(*clauses)
+        result = db.session.execute(
+            _newest_first(cols).execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        for rows in result.partitions():
+            yield "".join(json.dumps(audit_schema.dump(r._mapping)) + "\n" for r in rows)
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson"), 200
@@ -1,122 +1,541 @@
 # routes_books.py
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from flask_jwt_extended import jwt_required
-from sqlalchemy import or_, asc, desc
+from sqlalchemy import or_, and_, asc, desc, select
 from sqlalchemy import asc, desc
-from models import db, Book, BookAudit
+from models import db, Book
+from audit import record_audit
 from schemas import BookSchema, BookAuditSchema
 from routes_users import current_user, is_admin
+from search import apply_subject_search
+from cache import TTLCache
+from catalog import catalog_etag, get_catalog_version, bump_catalog_version
+from facets import (
+    FACET_FILTER_ARGS, facet_key, move_facet_counts, can_use_aggregates,
+    counts_from_aggregates, counts_from_query,
+)
+from importer import import_books
+from pagination import encode_cursor, decode_cursor, is_row_id, MIN_ROW_ID, MAX_ROW_ID
+from prices import (
+    parse_as_of, price_as_of, record_prices, clear_price_history,
+)
+from fuzzy import title_index
+from autocomplete import KINDS as SUGGESTION_KINDS, MAX_SUGGESTIONS, suggestions_index
+from serializers import BOOK_COLUMNS, book_row, book_dict, dumps, json_response
+import io
 import json
+import math
 
 books_bp = Blueprint("books", __name__)
 book_schema = BookSchema()
-books_schema = BookSchema(many=True)
 audit_schema = BookAuditSchema()
 
+MAX_PAGE_SIZE = 100
+MAX_LOOKUP_IDS = 500
+STREAM_BATCH_SIZE = 500
+
+# total_count per (catalog version, publisher, level, subject); a book
+# mutation bumps the version, so stale counts are simply never looked up
+filter_count_cache = TTLCache(maxsize=512, ttl=60)
+
 
 @books_bp.route("/books", methods=["GET"])
+@catalog_etag
 def get_all_books():
     """
     Returns all books in the database (no filters).
     Example usage: GET /api/books
+                   GET /api/books?format=ndjson   (one JSON object per line)
+                   GET /api/books?as_of=2025-01-01   (prices at that time)
+                   GET /api/books?ids=12,7,31   (just these books, see lookup_books)
+
+    The body is streamed: rows are read from the database in batches and
+    serialized as they go, so memory use does not grow with the catalog.
+    The default output is still a single JSON array.
     """
-    books = Book.query.all()
-    return jsonify(books_schema.dump(books)), 200
+    try:
+        as_of = parse_as_of(request.args.get("as_of"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if "ids" in request.args:
+        raw_ids = [v for raw in request.args.getlist("ids") for v in raw.split(",") if v.strip()]
+        return _lookup_response(raw_ids, as_of)
+
+    fmt = request.args.get("format", "json")
+    if fmt not in ("json", "ndjson"):
+        return jsonify({"error": "format must be 'json' or 'ndjson'"}), 400
+
+    rows = _iter_book_rows(as_of)
+    if fmt == "ndjson":
+        body = _ndjson_chunks(rows)
+        mimetype = "application/x-ndjson"
+    else:
+        body = _json_array_chunks(rows)
+        mimetype = "application/json"
+    return Response(stream_with_context(body), mimetype=mimetype), 200
+
+
+@books_bp.route("/books/lookup", methods=["POST"])
+def lookup_books():
+    """
+    Public endpoint: fetch many books by id in one round trip.
+    Body: {"ids": [12, 7, 31], "as_of": "2025-01-01"}   (as_of optional)
+    Same as GET /api/books?ids=12,7,31, for id lists too long for a URL.
+    Returns {"data": [...books in request order...], "not_found": [ids]}.
+    """
+    data = request.get_json(silent=True) or {}
+    ids = data.get("ids")
+    if not isinstance(ids, list):
+        return jsonify({"error": "Missing 'ids' array"}), 400
+    try:
+        as_of = parse_as_of(data.get("as_of"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return _lookup_response(ids, as_of)
+
+
+def _lookup_response(raw_ids, as_of=None):
+    """
+    Load the books in raw_ids with a single IN query (primary key lookups).
+    Duplicates are returned once, in first-seen order.
+    """
+    try:
+        ids = list(dict.fromkeys(_parse_id(i) for i in raw_ids))
+    except ValueError:
+        return jsonify({"error": "ids must be 64-bit integers"}), 400
+    if not ids:
+        return jsonify({"error": "ids must not be empty"}), 400
+    if len(ids) > MAX_LOOKUP_IDS:
+        return jsonify({"error": f"At most {MAX_LOOKUP_IDS} ids per lookup"}), 400
+
+    stmt = select(*_book_columns(as_of)).where(Book.id.in_(ids))
+    found = {row.id: book_row(row) for row in db.session.execute(stmt)}
+    return json_response({
+        "data": [found[i] for i in ids if i in found],
+        "not_found": [i for i in ids if i not in found],
+    })
+
+
+def _parse_id(value):
+    """
+    A book id from a JSON number or a query-string value ("12").
+    Raises ValueError for anything else, including bools, floats and ints
+    that do not fit the 64-bit id column.
+    """
+    if isinstance(value, str):
+        value = int(value)
+    if not is_row_id(value):
+        raise ValueError("not a row id")
+    return value
+
+
+def _book_columns(as_of=None):
+    """
+    BOOK_COLUMNS, with 'price' replaced by the price at 'as_of' if given.
+    """
+    if as_of is None:
+        return BOOK_COLUMNS
+    return tuple(price_as_of(as_of).label("price") if c.key == "price" else c
+                 for c in BOOK_COLUMNS)
+
+
+def _iter_book_rows(as_of=None):
+    """
+    Yield every book as a list of dicts, one list per STREAM_BATCH_SIZE rows.
+    With 'as_of', 'price' is the book's price at that time.
+    """
+    stmt = select(*_book_columns(as_of)).order_by(Book.id)
+    result = db.session.execute(stmt.execution_options(yield_per=STREAM_BATCH_SIZE))
+    for rows in result.partitions():
+        yield [book_row(r) for r in rows]
+
+
+def _json_array_chunks(batches):
+    """Serialize batches into one JSON array, emitting one chunk per batch."""
+    yield b"["
+    first = True
+    for batch in batches:
+        # dumps() of the list, minus its brackets
+        yield (b"" if first else b",") + dumps(batch)[1:-1]
+        first = False
+    yield b"]"
+
+
+def _ndjson_chunks(batches):
+    """Serialize batches as newline-delimited JSON, one chunk per batch."""
+    for batch in batches:
+        yield b"".join(dumps(d) + b"\n" for d in batch)
 
 
 @books_bp.route("/filter", methods=["GET"])
+@catalog_etag
 def filter_books():
     """
     Public endpoint: filter/search/sort/paginate books
     Example: GET /api/filter?publisher=xx&level=pp1&subject=math&sort=title&direction=asc
+
+    'subject' is a full-text search over title/publisher/level (prefix
+    matching, so 'skill lang' finds 'KLB skillgrow language activities').
+    With a subject and no explicit sort (or sort=relevance), results come
+    back best match first.
+
+    Pagination comes in two modes:
+      - page mode (default): ?page=3&limit=10
+      - cursor mode: ?after=&limit=10 for the first page, then pass the
+        returned 'next_cursor' as ?after=<cursor>. Deep pages cost the same
+        as the first one. Only available for title/price sorts.
+
+    count=exact|none controls 'total_count'. Page mode defaults to exact
+    (served from a short-lived cache), cursor mode to none.
+
+    'publisher' and 'level' are substring matches for the search boxes.
+    Exact, index-friendly filters for facet pickers:
+      publisher_in=LONGHORN,KLB  level_in=pp1,pp2  status=APPROVED
+      min_price=100  max_price=500
+
+    as_of=2025-01-01 (or a full timestamp) reports, filters and sorts by
+    each book's price at that time, from the price history.
+
+    fuzzy=1 makes 'subject' a typo-tolerant title search ('skillgrow
+    langauge' finds 'KLB skillgrow language activities'). It is served
+    from the in-memory trigram index and ranked by similarity, and each
+    row gets a 'score'. Page mode only; the other filters still apply.
     """
     from math import ceil
 
-    publisher_query = request.args.get("publisher", "").strip()
-    level_query = request.args.get("level", "").strip()
-    subject_query = request.args.get("subject", "").strip()
-    sort_by = request.args.get("sort", "title")
+    sort_by = request.args.get("sort")
     direction = request.args.get("direction", "asc")
 
-    page = int(request.args.get("page", 1))
-    limit = int(request.args.get("limit", 10))
-
-    q = Book.query
+    cursor_mode = "after" in request.args
+    count_mode = request.args.get("count", "none" if cursor_mode else "exact")
+    try:
+        page = max(int(request.args.get("page", 1)), 1)
+        limit = min(max(int(request.args.get("limit", 10)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({"error": "page and limit must be integers"}), 400
+    # The offset is bound as a 64-bit integer
+    if (page - 1) * limit > MAX_ROW_ID:
+        return jsonify({"error": "page is out of range"}), 400
+    try:
+        filters = _read_filter_args()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if request.args.get("fuzzy", "").lower() in ("1", "true", "yes"):
+        if not filters["subject"]:
+            return jsonify({"error": "fuzzy search needs a 'subject'"}), 400
+        if cursor_mode:
+            return jsonify({"error": "Cursor pagination is not available with fuzzy=1"}), 400
+        return _fuzzy_page(filters, page, limit)
 
-    # Filter
-    if publisher_query:
-        q = q.filter(Book.publisher.ilike(f"%{publisher_query}%"))
-    if level_query:
-        q = q.filter(Book.level.ilike(f"%{level_query}%"))
     # If your user is passing 'subject=kenya',
-    # match any columns that might contain 'kenya':
-    if subject_query:
-        q = q.filter(or_(
-            Book.title.ilike(f"%{subject_query}%"),
-            Book.publisher.ilike(f"%{subject_query}%"),
-            # check above and make it f"%{publisher_query}%"
-            Book.level.ilike(f"%{subject_query}%"),
-        ))
-
-    # Sort
-    if sort_by == "price":
-        col = Book.price
-    else:
-        col = Book.title
-
-    if direction == "desc":
-        q = q.order_by(desc(col))
-    else:
-        q = q.order_by(asc(col))
-
-    total_count = q.count()
+    # match any of title/publisher/level via the full-text index:
+    ranked = bool(filters["subject"]) and sort_by in (None, "relevance")
+    q = _apply_filters(Book.query, filters, ranked=ranked)
+
+    total_count = None
+    if count_mode == "exact":
+        version, _ = get_catalog_version()
+        count_key = (version,) + tuple(sorted(filters.items()))
+        total_count = filter_count_cache.get(count_key)
+        if total_count is None:
+            total_count = q.order_by(None).count()
+            filter_count_cache.set(count_key, total_count)
+
+    # Sort (id breaks ties so pages never overlap or skip rows). NULL
+    # prices go first ascending and last descending on every database,
+    # which _keyset_after relies on
+    as_of = filters["as_of"]
+    if not ranked:
+        if sort_by == "price":
+            col = price_as_of(as_of) if as_of else Book.price
+        else:
+            col = Book.title
+        if direction == "desc":
+            q = q.order_by(desc(col).nulls_last(), desc(Book.id))
+        else:
+            q = q.order_by(asc(col).nulls_first(), asc(Book.id))
+
+    if cursor_mode:
+        if ranked:
+            return jsonify({"error": "Cursor pagination requires sort=title or sort=price"}), 400
+        sort_name = "price" if sort_by == "price" else "title"
+        after = request.args.get("after", "")
+        if after:
+            try:
+                key, last_id = _decode_cursor(after, sort_name, direction)
+            except ValueError:
+                return jsonify({"error": "Invalid cursor"}), 400
+            q = q.filter(_keyset_after(col, key, last_id, direction))
+
+    # Plain column tuples (price as of 'as_of' if given), not ORM objects
+    q = q.with_entities(*_book_columns(as_of))
+
+    if cursor_mode:
+        # Fetch one extra row to learn whether another page exists
+        rows = q.limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = _encode_cursor(sort_name, direction, getattr(last, sort_name), last.id)
+        return json_response({
+            "limit": limit,
+            "total_count": total_count,
+            "next_cursor": next_cursor,
+            "data": [book_row(r) for r in rows]
+        })
 
     # Simple pagination
-    from math import ceil
-    total_count = q.count()
-    total_pages = ceil(total_count / limit)
     offset_val = (page - 1) * limit
-    # total_pages = ceil(total_count / limit)
-    # offset_val = (page - 1) * limit
-
-    books_list = q.offset(offset_val).limit(limit).all()
-    # data = books_schema.dump(books_list)
-    data = []
-    for b in books_list:
-        data.append({
-            "id": b.id,
-            "title": b.title,
-            "publisher": b.publisher,
-            "price": b.price,
-            "level": b.level,
-            "status": b.status
-        })
+    rows = q.offset(offset_val).limit(limit).all()
 
-    # return jsonify({
-    #     "page": page,
-    #     "limit": limit,
-    #     "total_count": total_count,
-    #     "total_pages": total_pages,
-    #     "data": data
-    # }), 200
-    return {
+    total_pages = ceil(total_count / limit) if total_count is not None else None
+    return json_response({
         "page": page,
         "limit": limit,
         "total_count": total_count,
         "total_pages": total_pages,
-        "data": data
-    }, 200
+        "data": [book_row(r) for r in rows]
+    })
+
+
+def _fuzzy_page(filters, page, limit):
+    """
+    One page of fuzzy title matches for filters["subject"], best first.
+    The trigram index picks (at most FUZZY_MAX_RESULTS) candidates, then
+    one IN query applies the remaining filters and loads the rows.
+    """
+    from math import ceil
+
+    index = title_index()
+    # Checked before searching: matches from an index still catching up
+    # with the catalog must not be cached under its ETag
+    current = index.is_current()
+    matches = index.search(filters["subject"])
+    scores = dict(matches)
+    rows = []
+    if matches:
+        q = _apply_filters(Book.query, {**filters, "subject": ""})
+        q = q.filter(Book.id.in_(scores)).with_entities(*_book_columns(filters["as_of"]))
+        rank = {book_id: i for i, (book_id, _) in enumerate(matches)}
+        rows = sorted(q.all(), key=lambda r: rank[r.id])
+
+    page_rows = rows[(page - 1) * limit:page * limit]
+    resp = json_response({
+        "page": page,
+        "limit": limit,
+        "total_count": len(rows),
+        "total_pages": ceil(len(rows) / limit),
+        "data": [dict(book_row(r), score=scores[r.id]) for r in page_rows],
+    })
+    if not current:
+        resp.cache_control.no_store = True
+    return resp
+
+
+def _read_filter_args():
+    """
+    Parse the filter args shared by /api/filter and /api/facets.
+    Raises ValueError with a client-facing message on bad input.
+    """
+    # type=float yields None for unparsable values
+    min_price = request.args.get("min_price", type=float)
+    max_price = request.args.get("max_price", type=float)
+    if "min_price" in request.args and min_price is None or \
+            "max_price" in request.args and max_price is None:
+        raise ValueError("min_price and max_price must be numbers")
+    as_of = parse_as_of(request.args.get("as_of"))
+
+    return {
+        "publisher": request.args.get("publisher", "").strip(),
+        "level": request.args.get("level", "").strip(),
+        "subject": request.args.get("subject", "").strip(),
+        "publisher_in": _multi_arg("publisher_in"),
+        "level_in": _multi_arg("level_in"),
+        "status": _multi_arg("status"),
+        "min_price": min_price,
+        "max_price": max_price,
+        "as_of": as_of,
+    }
+
+
+def _apply_filters(q, filters, ranked=False, skip=()):
+    """
+    Apply the parsed filter args to a Book query. Keys listed in 'skip'
+    are ignored (facet counts leave out their own facet's selection).
+    """
+    f = {k: v for k, v in filters.items() if k not in skip}
+
+    # Exact filters first: these can use the ix_books_* indexes
+    if f.get("publisher_in"):
+        q = q.filter(Book.publisher.in_(f["publisher_in"]))
+    if f.get("level_in"):
+        q = q.filter(Book.level.in_(f["level_in"]))
+    if f.get("status"):
+        q = q.filter(Book.status.in_(f["status"]))
+    price = price_as_of(f["as_of"]) if f.get("as_of") else Book.price
+    if f.get("min_price") is not None:
+        q = q.filter(price >= f["min_price"])
+    if f.get("max_price") is not None:
+        q = q.filter(price <= f["max_price"])
+
+    # Substring filters
+    if f.get("publisher"):
+        q = q.filter(Book.publisher.ilike(f"%{f['publisher']}%"))
+    if f.get("level"):
+        q = q.filter(Book.level.ilike(f"%{f['level']}%"))
+    if f.get("subject"):
+        q = apply_subject_search(q, f["subject"], ranked=ranked)
+    return q
+
+
+def _multi_arg(name):
+    """
+    Read a multi-value query arg given as ?x=a,b or ?x=a&x=b.
+    Returns a sorted tuple (hashable, so it can be part of a cache key).
+    """
+    values = set()
+    for raw in request.args.getlist(name):
+        values.update(v.strip() for v in raw.split(",") if v.strip())
+    return tuple(sorted(values))
+
+
+def _encode_cursor(sort_name, direction, key, book_id):
+    """Pack the last row's sort key + id into an opaque, URL-safe token."""
+    return encode_cursor([sort_name, direction, key, book_id])
+
+
+def _decode_cursor(token, sort_name, direction):
+    """
+    Unpack a token made by _encode_cursor. Raises ValueError if it is
+    malformed or was issued for a different sort/direction.
+    """
+    cur_sort, cur_dir, key, book_id = decode_cursor(token, 4)
+    if cur_sort != sort_name or cur_dir != direction or not is_row_id(book_id):
+        raise ValueError("cursor does not match this sort")
+    if not _is_sort_key(sort_name, key):
+        raise ValueError("cursor does not match this sort")
+    return key, book_id
+
+
+def _is_sort_key(sort_name, key):
+    """
+    True if 'key' can be a row's sort value and bound as such: a title
+    string, or a price that is NULL, a finite float or a 64-bit int.
+    """
+    if sort_name == "title":
+        return isinstance(key, str)
+    if key is None:
+        return True
+    if isinstance(key, float):
+        return math.isfinite(key)
+    return (isinstance(key, int) and not isinstance(key, bool)
+            and MIN_ROW_ID <= key <= MAX_ROW_ID)
+
+
+def _keyset_after(col, key, last_id, direction):
+    """
+    WHERE clause selecting rows strictly after (key, last_id) in the order
+    used by filter_books: NULLs first ascending and last descending, so a
+    NULL key (books without a price) needs its own branch.
+    """
+    if direction == "desc":
+        if key is None:
+            return and_(col.is_(None), Book.id < last_id)
+        return or_(
+            col < key,
+            and_(col == key, Book.id < last_id),
+            col.is_(None),
+        )
+    if key is None:
+        return or_(
+            and_(col.is_(None), Book.id > last_id),
+            col.isnot(None),
+        )
+    return or_(col > key, and_(col == key, Book.id > last_id))
+
+
+@books_bp.route("/facets", methods=["GET"])
+@catalog_etag
+def get_facets():
+    """
+    Public endpoint: number of books per publisher, level and status.
+    Accepts the same filter args as /api/filter, e.g.
+        GET /api/facets?level_in=pp1,pp2&status=APPROVED
+    Returns {"publisher": [{"value": "LONGHORN", "count": 78}, ...],
+             "level": [...], "status": [...]}
+
+    A facet's own selection is not applied to its counts (so ticking
+    'pp1' still shows how many 'pp2' books there are). Exact-match
+    filters are answered from book_facet_counts; substring, subject and
+    price filters fall back to a GROUP BY over the matching books.
+    """
+    try:
+        filters = _read_filter_args()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if filters["min_price"] is None and filters["max_price"] is None:
+        filters["as_of"] = None  # only changes which books match a price range
+
+    if can_use_aggregates(filters):
+        return jsonify(counts_from_aggregates(filters)), 200
+
+    result = {}
+    for facet, arg in FACET_FILTER_ARGS.items():
+        q = _apply_filters(Book.query, filters, skip=(arg,))
+        result[facet] = counts_from_query(q, facet)
+    return jsonify(result), 200
+
+
+@books_bp.route("/autocomplete", methods=["GET"])
+def autocomplete():
+    """
+    Public endpoint: search-box suggestions for a typed prefix, from the
+    in-memory prefix index (no /api/filter query per keystroke).
+    Example: GET /api/autocomplete?q=skillg&limit=8
+             GET /api/autocomplete?q=long&type=publisher
+    Matches at any word start. Returns {"query": "skillg", "suggestions":
+    [{"text": "KLB skillgrow language", "type": "title", "count": 2}, ...]}.
+    """
+    q = request.args.get("q", "")
+    try:
+        limit = min(max(int(request.args.get("limit", 10)), 1), MAX_SUGGESTIONS)
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    kind = request.args.get("type")
+    if kind and kind not in SUGGESTION_KINDS:
+        return jsonify({"error": f"type must be one of {', '.join(SUGGESTION_KINDS)}"}), 400
+
+    kinds = (kind,) if kind else SUGGESTION_KINDS
+    return json_response({"query": q, "suggestions": suggestions_index().suggest(q, limit, kinds)})
 
 
 @books_bp.route("/books/<int:book_id>", methods=["GET"])
+@catalog_etag
 def get_book(book_id):
-    """Public endpoint: get single book by ID."""
-    book = Book.query.get(book_id)
-    if not book:
+    """
+    Public endpoint: get single book by ID.
+    ?as_of=2025-01-01T12:00 returns the price it had at that time
+    (null if it had none yet).
+    """
+    try:
+        as_of = parse_as_of(request.args.get("as_of"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    row = db.session.execute(
+        select(*_book_columns(as_of)).where(Book.id == book_id)
+    ).first()
+    if not row:
         return jsonify({"error": f"No book found with ID {book_id}"}), 404
 
-    return jsonify(book_schema.dump(book)), 200
+    data = book_row(row)
+    if as_of is not None:
+        data["as_of"] = as_of.isoformat()
+    return json_response(data)
 
 
 @books_bp.route("/books", methods=["POST"])
@@ -137,20 +556,51 @@ def create_book():
 
     new_book = Book(**data)
     db.session.add(new_book)
+    move_facet_counts(None, facet_key(new_book))
+    bump_catalog_version()
+    db.session.flush()  # assigns new_book.id for the audit row and price history
+    record_prices([(new_book.id, new_book.price)])
+
+    # Log the CREATE action (committed with the book, see audit.py)
+    new_data = book_dict(new_book)
+    record_audit(user.id, new_book.id, "CREATE", new_data=json.dumps(new_data))
     db.session.commit()
+    title_index().update(new_book.id, new_book.title)
+    suggestions_index().update(new=(new_book.title, new_book.publisher))
+
+    return jsonify(new_data), 201
 
-    # Log the CREATE action
-    audit = BookAudit(
-        user_id=user.id,
-        book_id=new_book.id,
-        action="CREATE",
-        old_data=None,
-        new_data=json.dumps(book_schema.dump(new_book)),
-    )
-    db.session.add(audit)
+
+@books_bp.route("/books/import", methods=["POST"])
+@jwt_required()
+def import_books_route():
+    """
+    Bulk-load a publisher price list. Only admin can import.
+    Body: the books.json document itself (raw JSON body), or a multipart
+    upload in the 'file' field. The body is parsed as it streams in.
+    Query: ?mode=replace (default, swaps the whole catalog atomically)
+           ?mode=append  (adds rows, committing batch by batch)
+    """
+    user = current_user()
+    if not user or not is_admin(user):
+        return jsonify({"error": "Admin permission required"}), 403
+
+    mode = request.args.get("mode", "replace")
+    if mode not in ("replace", "append"):
+        return jsonify({"error": "mode must be 'replace' or 'append'"}), 400
+
+    upload = request.files.get("file")
+    raw = upload.stream if upload else request.stream
+    try:
+        result = import_books(io.TextIOWrapper(raw, encoding="utf-8"), replace=(mode == "replace"))
+    except (ValueError, UnicodeDecodeError) as e:
+        return jsonify({"error": f"Could not import: {e}"}), 400
+
+    # Log the IMPORT action (one row for the whole load)
+    record_audit(user.id, None, "IMPORT", new_data=json.dumps({"mode": mode, **result}))
     db.session.commit()
 
-    return jsonify(book_schema.dump(new_book)), 201
+    return jsonify({"mode": mode, **result}), 200
 
 
 @books_bp.route("/books/<int:book_id>", methods=["PUT"])
@@ -173,26 +623,27 @@ def update_book(book_id):
         return jsonify(errors), 400
 
     # Keep old data for logging
-    old_data = book_schema.dump(book)
+    old_data = book_dict(book)
+    old_facets = facet_key(book)
 
     for key, val in data.items():
         setattr(book, key, val)
 
-    db.session.commit()
+    move_facet_counts(old_facets, facet_key(book))
+    if book.price != old_data["price"]:
+        record_prices([(book.id, book.price)])
+    bump_catalog_version()
 
     # Keep new data for logging
-    new_data = book_schema.dump(book)
-    audit = BookAudit(
-        user_id=user.id,
-        book_id=book.id,
-        action="UPDATE",
-        old_data=json.dumps(old_data),
-        new_data=json.dumps(new_data),
-    )
-    db.session.add(audit)
+    new_data = book_dict(book)
+    record_audit(user.id, book.id, "UPDATE",
+                 old_data=json.dumps(old_data), new_data=json.dumps(new_data))
     db.session.commit()
+    title_index().update(book.id, book.title)
+    suggestions_index().update(old=(old_data["title"], old_data["publisher"]),
+                               new=(book.title, book.publisher))
 
-    return jsonify(book_schema.dump(book)), 200
+    return jsonify(new_data), 200
 
 
 @books_bp.route("/books/<int:book_id>", methods=["DELETE"])
@@ -209,21 +660,18 @@ def delete_book(book_id):
     if not book:
         return jsonify({"error": "Book not found"}), 404
 
-    old_data = book_schema.dump(book)
+    old_data = book_dict(book)
 
+    clear_price_history(book_id)
     db.session.delete(book)
-    db.session.commit()
+    move_facet_counts(facet_key(book), None)
+    bump_catalog_version()
 
     # Log the DELETE action
-    audit = BookAudit(
-        user_id=user.id,
-        book_id=book_id,
-        action="DELETE",
-        old_data=json.dumps(old_data),
-        new_data=None,
-    )
-    db.session.add(audit)
+    record_audit(user.id, book_id, "DELETE", old_data=json.dumps(old_data))
     db.session.commit()
+    title_index().update(book_id)
+    suggestions_index().update(old=(old_data["title"], old_data["publisher"]))
 
     return jsonify({"message": f"Book {book_id} deleted"}), 200
 
@@ -2,50 +2,74 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
 from datetime import datetime
+from sqlalchemy import insert, select, func, or_, and_
 from models import db, Book, Invoice, InvoiceItem
 from routes_users import current_user  # A helper function to get the logged-in user
+from pagination import encode_time_cursor, decode_time_cursor, is_row_id
+from rollups import record_sales
+from serializers import row_serializer, json_response
 
 invoices_bp = Blueprint("invoices", __name__)
 
-@invoices_bp.route("/invoices", methods=["POST"])
-@jwt_required()
-def create_invoice():
-    """
-    Creates an invoice for the current user.
-    Expects JSON:
-    {
-      "book_ids": [1, 2, 3],
-      "quantities": [1, 2, 1]  # optional if you want quantity
-    }
+MAX_BATCH_INVOICES = 500
+MAX_INVOICE_PAGE = 100
+MAX_QUANTITY = 2 ** 31 - 1
+FETCH_CHUNK_SIZE = 500
+
+# Row shapes for the read endpoints, in the order the columns are selected
+invoice_summary = row_serializer(("id", "created_at", "total_price", "item_count", "total_quantity"))
+invoice_line = row_serializer(("book_id", "title", "book_price", "quantity"))
+
+class InvoiceError(Exception):
+    """A client error in an invoice payload (becomes a 400)."""
 
-    Returns the created invoice with line items.
-    """
-    user = current_user()
-    if not user:
-        return jsonify({"error": "Not authenticated"}), 401
 
-    data = request.get_json() or {}
+def _parse_cart(data):
+    """Validate one {"book_ids": [...], "quantities": [...]} payload."""
+    if not isinstance(data, dict):
+        raise InvoiceError("Expected a JSON object")
     book_ids = data.get("book_ids")
-    if not book_ids:
-        return jsonify({"error": "Missing 'book_ids' array"}), 400
+    if not book_ids or not isinstance(book_ids, list):
+        raise InvoiceError("Missing 'book_ids' array")
+    if not all(is_row_id(b) for b in book_ids):
+        raise InvoiceError("book_ids must be integers")
 
     quantities = data.get("quantities", [1]*len(book_ids))
-    if len(book_ids) != len(quantities):
-        return jsonify({"error": "Mismatch: book_ids & quantities lengths"}), 400
+    if not isinstance(quantities, list) or len(book_ids) != len(quantities):
+        raise InvoiceError("Mismatch: book_ids & quantities lengths")
+    # bool is an int subclass: true must not pass as a quantity of 1
+    if not all(isinstance(q, int) and not isinstance(q, bool) and 0 < q <= MAX_QUANTITY
+               for q in quantities):
+        raise InvoiceError("Quantities must be positive integers")
+    return book_ids, quantities
 
-    # Fetch the books
-    books = Book.query.filter(Book.id.in_(book_ids)).all()
-    if len(books) != len(book_ids):
-        return jsonify({"error": "Some book IDs not found"}), 400
 
+def _fetch_books(book_ids):
+    """
+    Load the given books keyed by id, with one IN query per
+    FETCH_CHUNK_SIZE distinct ids (a batch can name more ids than the
+    database accepts as bound parameters in one statement).
+    """
+    unique_ids = list(set(book_ids))
+    books_by_id = {}
+    for start in range(0, len(unique_ids), FETCH_CHUNK_SIZE):
+        chunk = unique_ids[start:start + FETCH_CHUNK_SIZE]
+        books_by_id.update((b.id, b) for b in Book.query.filter(Book.id.in_(chunk)))
+    return books_by_id
+
+
+def _build_invoice(user, book_ids, quantities, books_by_id, now):
+    """
+    Build an (unsaved) Invoice and its line items from a cart.
+    O(n) in the cart size thanks to the id -> Book dict.
+    """
     # Build line items & total
     total_price = 0.0
     line_items = []
-    for i, book_id in enumerate(book_ids):
-        book_obj = next((b for b in books if b.id == book_id), None)
-        qty = quantities[i]
+    for book_id, qty in zip(book_ids, quantities):
+        book_obj = books_by_id.get(book_id)
         if not book_obj:
-            return jsonify({"error": f"Book {book_id} not found"}), 400
+            raise InvoiceError(f"Book {book_id} not found")
         cost = (book_obj.price or 0.0) * qty
         total_price += cost
         line_items.append({
@@ -55,89 +79,231 @@ def create_invoice():
             "quantity": qty
         })
 
-    # Create invoice
-    from models import Invoice, InvoiceItem
     invoice = Invoice(
         user_id=user.id,
-        created_at=datetime.utcnow(),
+        created_at=now,
         total_price=total_price
     )
-    db.session.add(invoice)
-    db.session.commit()
+    return invoice, line_items
 
-    # Create invoice items
-    invoice_items = []
-    for li in line_items:
-        ii = InvoiceItem(
-            invoice_id=invoice.id,
-            book_id=li["book_id"],
-            book_price=li["book_price"],
-            quantity=li["quantity"]
-        )
-        db.session.add(ii)
-        invoice_items.append(ii)
 
-    db.session.commit()
+def _save_invoices(built, books_by_id):
+    """
+    Persist [(invoice, line_items), ...] in the current transaction:
+    one flush for the invoice rows, then one executemany for every item,
+    and fold the items into the sales rollups. The caller commits.
+    """
+    db.session.add_all([invoice for invoice, _ in built])
+    db.session.flush()  # assigns invoice ids
 
-    # Build response
-    result = {
+    rows = [
+        {
+            "invoice_id": invoice.id,
+            "book_id": li["book_id"],
+            "book_price": li["book_price"],
+            "quantity": li["quantity"],
+        }
+        for invoice, line_items in built
+        for li in line_items
+    ]
+    if rows:
+        db.session.execute(insert(InvoiceItem), rows)
+
+    record_sales(
+        (invoice.created_at.date(), books_by_id[li["book_id"]], li["quantity"], li["book_price"])
+        for invoice, line_items in built
+        for li in line_items
+    )
+
+
+def _invoice_result(user, invoice, line_items):
+    return {
         "id": invoice.id,
         "user_name": user.username,
         "created_at": invoice.created_at.isoformat(),
         "total_price": invoice.total_price,
         "items": line_items
     }
-    return jsonify(result), 201
+
+
+@invoices_bp.route("/invoices", methods=["POST"])
+@jwt_required()
+def create_invoice():
+    """
+    Creates an invoice for the current user.
+    Expects JSON:
+    {
+      "book_ids": [1, 2, 3],
+      "quantities": [1, 2, 1]  # optional if you want quantity
+    }
+
+    Returns the created invoice with line items.
+    The invoice, all its items and the sales rollup updates are written
+    in a single transaction.
+    """
+    user = current_user()
+    if not user:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    data = request.get_json(silent=True)
+    try:
+        book_ids, quantities = _parse_cart(data)
+        books_by_id = _fetch_books(book_ids)
+        invoice, line_items = _build_invoice(
+            user, book_ids, quantities, books_by_id, datetime.utcnow()
+        )
+    except InvoiceError as e:
+        return jsonify({"error": str(e)}), 400
+
+    _save_invoices([(invoice, line_items)], books_by_id)
+    db.session.commit()
+
+    return jsonify(_invoice_result(user, invoice, line_items)), 201
+
+
+@invoices_bp.route("/invoices/batch", methods=["POST"])
+@jwt_required()
+def create_invoices_batch():
+    """
+    Creates many invoices for the current user in one request.
+    Expects JSON:
+    {
+      "invoices": [
+        {"book_ids": [1, 2], "quantities": [10, 5]},
+        {"book_ids": [7]}
+      ]
+    }
+
+    All-or-nothing: if any cart is invalid nothing is written and the
+    error names the offending index. Books for every cart are loaded with
+    a single query and everything is committed once.
+    """
+    user = current_user()
+    if not user:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Expected a JSON object"}), 400
+    carts = data.get("invoices")
+    if not carts or not isinstance(carts, list):
+        return jsonify({"error": "Missing 'invoices' array"}), 400
+    if len(carts) > MAX_BATCH_INVOICES:
+        return jsonify({"error": f"At most {MAX_BATCH_INVOICES} invoices per batch"}), 400
+
+    parsed = []
+    for i, cart in enumerate(carts):
+        try:
+            parsed.append(_parse_cart(cart))
+        except InvoiceError as e:
+            return jsonify({"error": f"invoices[{i}]: {e}"}), 400
+
+    books_by_id = _fetch_books([book_id for book_ids, _ in parsed for book_id in book_ids])
+    now = datetime.utcnow()
+    built = []
+    for i, (book_ids, quantities) in enumerate(parsed):
+        try:
+            built.append(_build_invoice(user, book_ids, quantities, books_by_id, now))
+        except InvoiceError as e:
+            return jsonify({"error": f"invoices[{i}]: {e}"}), 400
+
+    _save_invoices(built, books_by_id)
+    db.session.commit()
+
+    return jsonify([_invoice_result(user, inv, items) for inv, items in built]), 201
 
 
 @invoices_bp.route("/invoices", methods=["GET"])
 @jwt_required()
 def list_invoices():
     """
-    Returns all invoices for the current logged-in user.
-    Example output: [{id, created_at, total_price}, ...]
+    Returns the current logged-in user's invoices, newest first, a page at a time.
+    Example: GET /api/invoices?limit=20
+             GET /api/invoices?limit=20&after=<next_cursor>
+    Example output:
+    {"limit": 20, "next_cursor": "..." or null,
+     "data": [{id, created_at, total_price, item_count, total_quantity}, ...]}
     """
     user = current_user()
     if not user:
         return jsonify({"error": "Not authenticated"}), 401
 
-    invoices = Invoice.query.filter_by(user_id=user.id).order_by(Invoice.created_at.desc()).all()
-    data = []
-    for inv in invoices:
-        data.append({
-            "id": inv.id,
-            "created_at": inv.created_at.isoformat(),
-            "total_price": inv.total_price
-        })
-    return jsonify(data), 200
+    try:
+        limit = min(max(int(request.args.get("limit", 20)), 1), MAX_INVOICE_PAGE)
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+
+    # Per-invoice aggregates, evaluated only for the rows on this page
+    # (via ix_invoice_items_invoice_id) rather than a join over all items
+    item_count = (
+        select(func.count(InvoiceItem.id))
+        .where(InvoiceItem.invoice_id == Invoice.id)
+        .scalar_subquery()
+    )
+    total_quantity = (
+        select(func.coalesce(func.sum(InvoiceItem.quantity), 0))
+        .where(InvoiceItem.invoice_id == Invoice.id)
+        .scalar_subquery()
+    )
+    stmt = (
+        select(Invoice.id, Invoice.created_at, Invoice.total_price,
+               item_count.label("item_count"), total_quantity.label("total_quantity"))
+        .where(Invoice.user_id == user.id)
+        .order_by(Invoice.created_at.desc(), Invoice.id.desc())
+    )
+
+    after = request.args.get("after")
+    if after:
+        try:
+            ts, last_id = decode_time_cursor(after)
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
+        stmt = stmt.where(or_(
+            Invoice.created_at < ts,
+            and_(Invoice.created_at == ts, Invoice.id < last_id),
+        ))
+
+    rows = db.session.execute(stmt.limit(limit + 1)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_time_cursor(rows[-1].created_at, rows[-1].id)
+
+    data = [invoice_summary(inv) for inv in rows]
+    return json_response({"limit": limit, "next_cursor": next_cursor, "data": data})
 
 @invoices_bp.route("/invoices/<int:invoice_id>", methods=["GET"])
 @jwt_required()
 def get_invoice(invoice_id):
     """
-    Returns details of a single invoice, including line items.
+    Returns details of a single invoice, including line items with book titles.
+    The invoice, its items and their titles come from one joined query.
     """
     user = current_user()
     if not user:
         return jsonify({"error": "Not authenticated"}), 401
 
-    invoice = Invoice.query.get(invoice_id)
-    if not invoice or invoice.user_id != user.id:
+    stmt = (
+        select(Invoice.id, Invoice.user_id, Invoice.created_at, Invoice.total_price,
+               # the invoice_line columns, in order
+               InvoiceItem.book_id, Book.title, InvoiceItem.book_price, InvoiceItem.quantity)
+        .outerjoin(InvoiceItem, InvoiceItem.invoice_id == Invoice.id)
+        .outerjoin(Book, Book.id == InvoiceItem.book_id)
+        .where(Invoice.id == invoice_id)
+        .order_by(InvoiceItem.id)
+    )
+    rows = db.session.execute(stmt).all()
+    if not rows or rows[0].user_id != user.id:
         return jsonify({"error": "Invoice not found or not yours"}), 404
 
-    # Build line items
-    line_items = []
-    for it in invoice.items:
-        line_items.append({
-            "book_id": it.book_id,
-            "book_price": it.book_price,
-            "quantity": it.quantity
-        })
+    # Build line items (an invoice without items yields one row of NULLs)
+    line_items = [invoice_line(it[4:]) for it in rows if it.book_id is not None]
 
+    invoice = rows[0]
     result = {
         "id": invoice.id,
-        "created_at": invoice.created_at.isoformat(),
+        "created_at": invoice.created_at,
         "total_price": invoice.total_price,
         "items": line_items
     }
-    return jsonify(result), 200
+    return json_response(result)
@@ -0,0 +1,58 @@
+# routes_reports.py
+
+from datetime import date
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from models import Book
+from rollups import DIMENSIONS, sales_report
+from routes_users import current_user, is_admin
+
+reports_bp = Blueprint("reports", __name__)
+
+
+@reports_bp.route("/reports/sales", methods=["GET"])
+@jwt_required()
+def get_sales_report():
+    """
+    Admin endpoint: revenue and quantity sold per book, publisher, level
+    or in total, read from the sales rollups (no scan of invoice_items).
+    Example: GET /api/reports/sales?dimension=publisher&since=2025-01-01&until=2025-02-01
+    Optional: key=<publisher/level/book id> for one entry, by_day=1 for a daily series.
+    since is inclusive, until exclusive (ISO dates).
+    """
+    user = current_user()
+    if not user or not is_admin(user):
+        return jsonify({"error": "Admin permission required"}), 403
+
+    dimension = request.args.get("dimension", "total")
+    if dimension not in DIMENSIONS:
+        return jsonify({"error": f"dimension must be one of {', '.join(DIMENSIONS)}"}), 400
+
+    bounds = {}
+    for arg in ("since", "until"):
+        raw = request.args.get(arg)
+        if not raw:
+            bounds[arg] = None
+            continue
+        try:
+            bounds[arg] = date.fromisoformat(raw)
+        except ValueError:
+            return jsonify({"error": f"{arg} must be an ISO date (YYYY-MM-DD)"}), 400
+
+    by_day = request.args.get("by_day", "").lower() in ("1", "true", "yes")
+    data = sales_report(dimension, bounds["since"], bounds["until"],
+                        key=request.args.get("key"), by_day=by_day)
+
+    if dimension == "book" and data:
+        # One IN query for the titles of the books in the report
+        ids = {int(entry["key"]) for entry in data}
+        titles = dict(Book.query.with_entities(Book.id, Book.title).filter(Book.id.in_(ids)))
+        for entry in data:
+            entry["title"] = titles.get(int(entry["key"]))
+
+    return jsonify({
+        "dimension": dimension,
+        "since": request.args.get("since"),
+        "until": request.args.get("until"),
+        "data": data,
+    }), 200
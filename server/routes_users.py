@@ -1,14 +1,23 @@
+from collections import namedtuple
 from flask import Blueprint, request, jsonify
-from werkzeug.security import generate_password_hash, check_password_hash
 from flask_jwt_extended import (
     jwt_required, create_access_token, get_jwt_identity
 )
 from models import db, User
 from schemas import UserSchema
+from cache import TTLCache
+from passwords import hash_password, verify_password, needs_rehash, HashingBusy
 
 users_bp = Blueprint("users", __name__)
 user_schema = UserSchema()
 
+# What the routes need to know about the caller, without an ORM instance
+Principal = namedtuple("Principal", ["id", "username", "role"])
+
+# user id -> Principal. Role changes made through this process invalidate
+# their entry at once; other worker processes pick them up within the TTL.
+principal_cache = TTLCache(maxsize=10000, ttl=300)
+
 
 @users_bp.route("/register", methods=["POST"])
 def register():
@@ -29,8 +38,11 @@ def register():
     if existing:
         return jsonify({"error": "Username already taken"}), 400
 
-    # Create user
-    pw_hash = generate_password_hash(password)
+    # Create user (hashing runs in the password pool, see passwords.py)
+    try:
+        pw_hash = hash_password(password)
+    except HashingBusy:
+        return _busy()
     new_user = User(username=username, password_hash=pw_hash, role="user")
     db.session.add(new_user)
     db.session.commit()
@@ -53,11 +65,23 @@ def login():
         return jsonify({"error": "Username and password required"}), 400
 
     user = User.query.filter_by(username=username).first()
-    if not user or not check_password_hash(user.password_hash, password):
-        return jsonify({"error": "Invalid username or password"}), 401
-
-    # Create token
-    access_token = create_access_token(identity=user.id)
+    try:
+        if not user or not verify_password(user.password_hash, password):
+            return jsonify({"error": "Invalid username or password"}), 401
+
+        # Upgrade hashes made with older cost settings while we have the password
+        if needs_rehash(user.password_hash):
+            user.password_hash = hash_password(password)
+            db.session.commit()
+    except HashingBusy:
+        return _busy()
+
+    # Create token (role/username travel as claims for the frontend)
+    access_token = create_access_token(
+        identity=str(user.id),  # PyJWT requires a string "sub"
+        additional_claims={"username": user.username, "role": user.role},
+    )
+    principal_cache.set(user.id, Principal(user.id, user.username, user.role))
 
     return jsonify({
         "access_token": access_token,
@@ -65,18 +89,40 @@ def login():
     }), 200
 
 
+def _busy():
+    """503 for when the password hashing pool is saturated."""
+    resp = jsonify({"error": "Server busy, please retry"})
+    resp.headers["Retry-After"] = "1"
+    return resp, 503
+
+
 def current_user():
     """
-    Helper to get the current logged-in user object (by ID).
-    Must be called inside a route with @jwt_required().
+    Helper to get the current logged-in user (by ID) as a Principal
+    (id, username, role). Must be called inside a route with @jwt_required().
+    Served from principal_cache; the database is only hit on a miss.
     """
     user_id = get_jwt_identity()
     if user_id is None:
         return None
-    return User.query.get(user_id)
+    user_id = int(user_id)
+
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        principal = Principal(user.id, user.username, user.role)
+        principal_cache.set(user_id, principal)
+    return principal
+
+
+def invalidate_principal(user_id):
+    """Forget the cached Principal for a user whose role/name changed."""
+    principal_cache.pop(user_id)
 
 
-def is_admin(user: User) -> bool:
+def is_admin(user: Principal) -> bool:
     """Check if the user has role='admin'."""
     return user and user.role == "admin"
 
@@ -103,6 +149,7 @@ def make_user_admin(user_id):
     # Update the role
     target_user.role = "admin"
     db.session.commit()
+    invalidate_principal(target_user.id)
 
     # Notify that the user is now an admin
     return jsonify({
@@ -134,6 +181,7 @@ def demote_user_from_admin(user_id):
     # Update the role to normal 'user'
     target_user.role = "user"
     db.session.commit()
+    invalidate_principal(target_user.id)
 
     # Notify that the user is now demoted
     return jsonify({
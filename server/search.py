@@ -0,0 +1,73 @@
+# search.py
+"""
+Full-text search helpers for the book catalog.
+
+On SQLite the 'books_fts' FTS5 table (see migration 3b7e1f2c9d40) is kept
+in sync with 'books' by triggers, so a subject search is an index lookup
+ranked by bm25. When the table is missing (other backends, or a database
+built with db.create_all()) we fall back to the old ilike scan.
+"""
+import re
+from flask import current_app
+from sqlalchemy import or_, inspect, table, column
+from models import db, Book
+
+FTS_TABLE = "books_fts"
+books_fts = table(FTS_TABLE, column("rowid"), column("rank"), column(FTS_TABLE))
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def fts_enabled() -> bool:
+    """Check (once per app) whether the books_fts index exists."""
+    ext = current_app.extensions
+    if FTS_TABLE not in ext:
+        engine = db.engine
+        ext[FTS_TABLE] = (
+            engine.dialect.name == "sqlite"
+            and inspect(engine).has_table(FTS_TABLE)
+        )
+    return ext[FTS_TABLE]
+
+
+def words(text):
+    """
+    The lowercase words of 'text', shared by every search index.
+    Example: words("KLB Skill-grow") -> ["klb", "skill", "grow"]
+    """
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+def build_match_query(term: str) -> str:
+    """
+    Turn free user input into a safe FTS5 MATCH expression.
+    Every word becomes a quoted prefix token, all of which must match:
+    'skillgrow lang' -> '"skillgrow"* "lang"*'
+    """
+    return " ".join(f'"{tok}"*' for tok in words(term))
+
+
+def apply_subject_search(q, term: str, ranked: bool = False):
+    """
+    Restrict a Book query to rows matching 'term' in title/publisher/level.
+    If ranked=True the results are ordered by relevance (best first).
+    """
+    if not fts_enabled():
+        q = q.filter(or_(
+            Book.title.ilike(f"%{term}%"),
+            Book.publisher.ilike(f"%{term}%"),
+            Book.level.ilike(f"%{term}%"),
+        ))
+        return q.order_by(Book.title.asc()) if ranked else q
+
+    match = build_match_query(term)
+    if not match:
+        # Only punctuation was typed; nothing can match
+        return q.filter(db.false())
+
+    q = q.join(books_fts, books_fts.c.rowid == Book.id)
+    q = q.filter(books_fts.c[FTS_TABLE].op("MATCH")(match))
+    if ranked:
+        # FTS5 'rank' is bm25(): smaller is more relevant
+        q = q.order_by(books_fts.c.rank.asc(), Book.id.asc())
+    return q
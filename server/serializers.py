@@ -0,0 +1,69 @@
+# serializers.py
+"""
+Fast JSON output for the book and invoice read endpoints.
+
+Read endpoints select plain column tuples (no ORM instances) in a fixed
+order and turn them into dicts with a serializer made once per shape by
+row_serializer(), instead of going through a marshmallow Schema's
+per-field dispatch for every row. BookSchema is still used to validate
+incoming data.
+
+JSON is encoded with orjson when it is installed, else with a reusable
+compact stdlib encoder. Both write datetimes as ISO 8601.
+"""
+import json
+from datetime import date
+from flask import Response
+from models import Book
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+# Column order of every serialized book row
+BOOK_COLUMNS = (Book.id, Book.publisher, Book.level, Book.isbn,
+                Book.title, Book.price, Book.status)
+BOOK_FIELDS = tuple(c.key for c in BOOK_COLUMNS)
+
+
+def row_serializer(fields):
+    """
+    Build a function turning a row tuple whose values are in 'fields'
+    order into a dict.
+    Example: book_row = row_serializer(BOOK_FIELDS); book_row(row)
+    """
+    fields = tuple(fields)
+
+    def serialize(row):
+        return dict(zip(fields, row))
+    return serialize
+
+
+book_row = row_serializer(BOOK_FIELDS)
+
+
+def book_dict(book):
+    """The book_row() dict for a Book instance (write endpoints, audit rows)."""
+    return {field: getattr(book, field) for field in BOOK_FIELDS}
+
+
+def _default(obj):
+    if isinstance(obj, date):  # also datetime
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+_encoder = json.JSONEncoder(separators=(",", ":"), default=_default, check_circular=False)
+
+
+def dumps(obj):
+    """Encode 'obj' as compact JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return _encoder.encode(obj).encode("utf-8")
+
+
+def json_response(obj, status=200):
+    """A JSON Response for 'obj' (drop-in for jsonify(obj), status)."""
+    return Response(dumps(obj), status=status, mimetype="application/json")
@@ -0,0 +1,159 @@
+# synthetic.py
+"""
+Synthetic dataset for benchmarks and load tests.
+
+generate_dataset() wipes the catalog, users and invoices and fills them
+with reproducible fake data (same seed, same rows). Rows go in with
+batched Core INSERTs and explicit ids, and the derived tables (facet
+counts, price history, sales rollups, catalog version) are rebuilt once
+at the end, so a million books takes tens of seconds, not hours.
+
+Every generated user has the password SYNTHETIC_PASSWORD; user 1 is
+"admin" (role admin), the others are "user2", "user3", ...
+
+Meant for throwaway databases (bench.py, `flask custom generate-data`):
+on a server database the id sequences are not advanced.
+"""
+import random
+from array import array
+from datetime import datetime, timedelta
+from sqlalchemy import delete, insert
+from models import (
+    db, User, Book, BookAudit, BookPrice, Invoice, InvoiceItem, SalesRollup,
+)
+from catalog import bump_catalog_version
+from facets import rebuild_facet_counts
+from prices import record_initial_prices
+from rollups import rebuild_sales_rollups
+
+SYNTHETIC_PASSWORD = "password"
+DEFAULT_BATCH_SIZE = 5000
+
+PUBLISHERS = [
+    "KENYA LITERATURE BUREAU", "LONGHORN", "OXFORD", "MORAN", "EAST AFRICAN EDUCATIONAL",
+    "SPOTLIGHT", "MENTOR", "STORYMOJA", "JKF", "CAMBRIDGE", "PEARSON", "ATLAS",
+    "QUEENEX", "TARGET", "BOOKMARK", "PHOENIX", "ONEPLANET", "APPROVED BOOKS",
+]
+LEVELS = ["pp1", "pp2"] + [f"grade {n}" for n in range(1, 10)] + [f"form {n}" for n in range(1, 5)]
+STATUSES = ["APPROVED"] * 8 + ["PENDING", "WITHDRAWN"]
+SUBJECTS = [
+    "mathematics", "english", "kiswahili", "science", "social studies", "agriculture",
+    "home science", "creative arts", "music", "religious education", "business studies",
+    "computer studies", "chemistry", "physics", "biology", "geography", "history",
+]
+SERIES = [
+    "skillgrow", "excel", "primary", "active", "top scholar", "spotlight", "comprehensive",
+    "new progressive", "living", "discovering", "distinction", "master", "pathway",
+]
+KINDS = ["learner's book", "activities", "teacher's guide", "workbook", "revision", "atlas"]
+
+
+def generate_dataset(books=100_000, users=1_000, invoices=10_000, max_items=5,
+                     seed=0, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """
+    Replace the database contents with a synthetic dataset.
+    progress, if given, is called as progress(table, rows_written).
+    Returns {"books": n, "users": n, "invoices": n, "invoice_items": n}.
+    """
+    from passwords import hash_password
+
+    rng = random.Random(seed)
+    users = max(users, 1)
+    try:
+        for model in (InvoiceItem, Invoice, SalesRollup, BookAudit, BookPrice, Book, User):
+            db.session.execute(delete(model))
+
+        # One hash shared by everyone: hashing thousands of passwords would dominate
+        password_hash = hash_password(SYNTHETIC_PASSWORD)
+        _insert_batches(User, (
+            {"id": i, "username": "admin" if i == 1 else f"user{i}",
+             "password_hash": password_hash, "role": "admin" if i == 1 else "user"}
+            for i in range(1, users + 1)
+        ), batch_size, progress)
+
+        prices = array("d")
+        _insert_batches(Book, (
+            _book(rng, i, prices) for i in range(1, books + 1)
+        ), batch_size, progress)
+
+        item_count = 0
+        if books and invoices:
+            item_ids = iter(range(1, invoices * max_items + 1))
+            invoice_rows, item_rows = [], []
+            start = datetime.utcnow() - timedelta(days=365)
+            for invoice_id in range(1, invoices + 1):
+                total = 0.0
+                for _ in range(rng.randint(1, max_items)):
+                    book_id = rng.randint(1, books)
+                    quantity = rng.randint(1, 10)
+                    price = prices[book_id - 1]
+                    total += price * quantity
+                    item_rows.append({"id": next(item_ids), "invoice_id": invoice_id,
+                                      "book_id": book_id, "book_price": price,
+                                      "quantity": quantity})
+                invoice_rows.append({
+                    "id": invoice_id,
+                    "user_id": rng.randint(1, users),
+                    "created_at": start + timedelta(seconds=rng.randrange(365 * 86400)),
+                    "total_price": total,
+                })
+                if len(invoice_rows) >= batch_size:
+                    item_count += _flush_invoices(invoice_rows, item_rows, progress)
+                    invoice_rows, item_rows = [], []
+            item_count += _flush_invoices(invoice_rows, item_rows, progress)
+
+        rebuild_facet_counts()
+        record_initial_prices()
+        rebuild_sales_rollups()
+        bump_catalog_version()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return {"books": books, "users": users, "invoices": invoices, "invoice_items": item_count}
+
+
+def _book(rng, book_id, prices):
+    price = float(rng.randrange(150, 2500))
+    prices.append(price)
+    level = rng.choice(LEVELS)
+    title = f"{rng.choice(SERIES)} {rng.choice(SUBJECTS)} {level} {rng.choice(KINDS)}"
+    return {
+        "id": book_id,
+        "publisher": rng.choice(PUBLISHERS),
+        "level": level,
+        "isbn": f"978{rng.randrange(10 ** 9, 10 ** 10)}",
+        "title": title,
+        "price": price,
+        "status": rng.choice(STATUSES),
+    }
+
+
+def _insert_batches(model, rows, batch_size, progress):
+    written = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            db.session.execute(insert(model), batch)
+            written += len(batch)
+            batch = []
+            if progress:
+                progress(model.__tablename__, written)
+    if batch:
+        db.session.execute(insert(model), batch)
+        written += len(batch)
+        if progress:
+            progress(model.__tablename__, written)
+    return written
+
+
+def _flush_invoices(invoice_rows, item_rows, progress):
+    if invoice_rows:
+        db.session.execute(insert(Invoice), invoice_rows)
+    if item_rows:
+        db.session.execute(insert(InvoiceItem), item_rows)
+    if progress and invoice_rows:
+        progress(Invoice.__tablename__, invoice_rows[-1]["id"])
+    return len(item_rows)
@@ -0,0 +1,49 @@
+# tests/conftest.py
+"""
+Shared fixtures: an app bound to a fresh, fully migrated SQLite file.
+
+The server modules import each other flat (from models import db), so
+the server directory goes on sys.path the way `flask run` from there
+would have it.
+"""
+import os
+import sys
+
+import pytest
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SERVER_DIR not in sys.path:
+    sys.path.insert(0, SERVER_DIR)
+
+MIGRATIONS_DIR = os.path.join(SERVER_DIR, "migrations")
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "books.db")
+
+
+@pytest.fixture
+def app(db_path):
+    from flask_migrate import upgrade
+    from app import create_app
+    from models import db
+
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///" + db_path,
+        "PASSWORD_HASH_WORKERS": 0,
+        "TESTING": True,
+        "SEARCH_INDEX_WARMUP": False,
+    })
+    with app.app_context():
+        upgrade(directory=MIGRATIONS_DIR)
+    yield app
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,65 @@
+# tests/test_filter_indexes.py
+"""
+The exact-match /api/filter filters must be served by the ix_books_*
+indexes: every SELECT on books the request runs is checked with
+EXPLAIN QUERY PLAN for a SEARCH on the expected index and no full scan.
+"""
+import pytest
+from sqlalchemy import event
+from models import db
+
+
+@pytest.fixture
+def catalog(app):
+    from synthetic import generate_dataset
+    with app.app_context():
+        generate_dataset(books=2000, users=1, invoices=0)
+    return app
+
+
+def _book_selects(app, client, query):
+    """(statement, parameters) of every SELECT on books run by GET /api/filter?query."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().startswith("SELECT") and "FROM books" in statement:
+            statements.append((statement, parameters))
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        resp = client.get("/api/filter?" + query)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    assert resp.status_code == 200, resp.get_json()
+    assert resp.get_json()["data"]
+    return statements
+
+
+def _plan(app, statement, parameters):
+    with app.app_context():
+        conn = db.engine.raw_connection()
+        try:
+            rows = conn.execute("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+        finally:
+            conn.close()
+    return [row[3] for row in rows]
+
+
+@pytest.mark.parametrize("query, index", [
+    ("publisher_in=LONGHORN,OXFORD", "ix_books_publisher_level_"),
+    ("publisher_in=LONGHORN&level_in=pp1,pp2", "ix_books_publisher_level_"),
+    ("publisher_in=LONGHORN&level_in=pp1&sort=price", "ix_books_publisher_level_price"),
+    ("level_in=pp1,pp2", "ix_books_level"),
+    ("status=APPROVED", "ix_books_status"),
+    ("min_price=100&max_price=500", "ix_books_price"),
+    ("min_price=100&max_price=500&sort=price&after=", "ix_books_price"),
+])
+def test_filter_uses_books_indexes(catalog, client, query, index):
+    statements = _book_selects(catalog, client, query)
+    assert statements
+    for statement, parameters in statements:
+        plan = _plan(catalog, statement, parameters)
+        assert any(step.startswith("SEARCH books USING") and index in step for step in plan), plan
+        assert not any(step.startswith("SCAN books") for step in plan), plan
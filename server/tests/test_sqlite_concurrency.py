@@ -0,0 +1,68 @@
+# tests/test_sqlite_concurrency.py
+"""
+The SQLite PRAGMAs from database.py on a real file: WAL mode is on, and
+concurrent writer and reader threads finish without "database is
+locked".
+"""
+import threading
+from sqlalchemy import func, insert, select, text
+from models import db, Book
+
+WRITERS = 4
+READERS = 4
+COMMITS_PER_WRITER = 50
+READS_PER_READER = 200
+
+
+def test_pragmas_applied(app):
+    with app.app_context():
+        assert db.session.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert db.session.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+        # synchronous=normal is 1
+        assert db.session.execute(text("PRAGMA synchronous")).scalar() == 1
+
+
+def test_concurrent_writers_and_readers(app):
+    errors = []
+    start = threading.Barrier(WRITERS + READERS)
+
+    def writer(n):
+        with app.app_context():
+            start.wait()
+            try:
+                for i in range(COMMITS_PER_WRITER):
+                    db.session.execute(insert(Book).values(
+                        publisher="WRITER", level=f"w{n}", isbn=f"{n}-{i}",
+                        title=f"writer {n} book {i}", price=100.0 + i, status="APPROVED"))
+                    db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                errors.append(e)
+            finally:
+                db.session.remove()
+
+    def reader():
+        with app.app_context():
+            start.wait()
+            try:
+                for _ in range(READS_PER_READER):
+                    db.session.scalar(select(func.count()).select_from(Book))
+                    db.session.rollback()  # end the read transaction so WAL can advance
+            except Exception as e:
+                errors.append(e)
+            finally:
+                db.session.remove()
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(WRITERS)]
+    threads += [threading.Thread(target=reader) for _ in range(READERS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not [e for e in errors if "database is locked" in str(e)], errors
+    assert not errors, errors
+    with app.app_context():
+        written = db.session.scalar(
+            select(func.count()).select_from(Book).where(Book.publisher == "WRITER"))
+    assert written == WRITERS * COMMITS_PER_WRITER